@@ -1,15 +1,85 @@
+import uuid
+
 from django.contrib import admin, messages
+from django.db import transaction
+from django.db.models import Q
+from django.http import HttpResponseRedirect
 
+from dashboard.stock.models import InsufficientStockError, StockItem
 from home.globals.adminsite import admin_site
 
 from .forms import OrderItemFormSet
-from .models import Order, OrderItem
+from .models import Order, OrderItem, deferred_status_updates, short_id_prefix_q
 
 # TODO: Have the is_completed be done by the staff member assigned to the order
 
 # TODO: If the order was already marked as completed and the status says Completed, if any item is marked as incompleted it should go back to the right status.
 
 
+def get_group_names(request):
+    """Return the names of the user's groups, fetched once per request."""
+    if not hasattr(request, "_group_names"):
+        request._group_names = set(request.user.groups.values_list("name", flat=True))
+    return request._group_names
+
+
+class OrderIdSearchMixin:
+    """
+    Search orders by full id or short id prefix, with an index seek, as well
+    as by ``search_fields``: words like "cafe" are valid short id prefixes
+    and usernames alike.
+    """
+
+    # Path from the admin's model to the order.
+    order_path = ""
+
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(
+            request, queryset, search_term
+        )
+        try:
+            q = Q(**{f"{self.order_path}id": uuid.UUID(search_term.strip())})
+        except ValueError:
+            q = short_id_prefix_q(search_term, f"{self.order_path}short_id")
+        if q is not None:
+            results |= queryset.filter(q)
+        return results, may_have_duplicates
+
+
+class StockErrorMixin:
+    """
+    Report stock that can't cover a change as an error message, rather than
+    a server error. Changes to the order itself are saved in the admin's
+    transaction, so nothing is kept. Item changes reserve their stock once
+    that transaction commits (see ``deferred_status_updates``), so they are
+    kept, and their order holds no more stock than before until it is fixed.
+
+    The forms check the stock available beforehand (see ``OrderItem.clean``),
+    this catches what changed meanwhile.
+    """
+
+    def get_stock_error_message(self, error):
+        items = StockItem.objects.in_bulk(error.shortages)
+        return "Not enough stock: " + ", ".join(
+            f"{items[pk].name if pk in items else pk} is short by {missing}"
+            for pk, missing in sorted(error.shortages.items())
+        )
+
+    def changeform_view(self, request, *args, **kwargs):
+        try:
+            return super().changeform_view(request, *args, **kwargs)
+        except InsufficientStockError as e:
+            self.message_user(request, self.get_stock_error_message(e), messages.ERROR)
+            return HttpResponseRedirect(request.get_full_path())
+
+    def changelist_view(self, request, *args, **kwargs):
+        try:
+            return super().changelist_view(request, *args, **kwargs)
+        except InsufficientStockError as e:
+            self.message_user(request, self.get_stock_error_message(e), messages.ERROR)
+            return HttpResponseRedirect(request.get_full_path())
+
+
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     formset = OrderItemFormSet
@@ -27,6 +97,15 @@ class OrderItemInline(admin.TabularInline):
             readonly.append("is_completed")
         return readonly
 
+    def get_queryset(self, request):
+        # OrderItem.clean() reads the available quantity of every item.
+        return (
+            super()
+            .get_queryset(request)
+            .select_related("item")
+            .prefetch_related("item__stripes")
+        )
+
     def get_min_num(self, request, obj=None, **kwargs):
         if obj is None:  # New order
             return 1
@@ -39,7 +118,7 @@ class OrderItemInline(admin.TabularInline):
 
 
 @admin.register(Order, site=admin_site)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(StockErrorMixin, OrderIdSearchMixin, admin.ModelAdmin):
     list_display = (
         "short_id",
         "creator",
@@ -49,13 +128,12 @@ class OrderAdmin(admin.ModelAdmin):
         "assigned_at",
         "created_at",
         "completion_status",
+        "total_quantity",
+        "total_price",
     )
+    list_select_related = ("creator", "staff_orders_handler")
     list_filter = ("status", "assigned_at", "created_at")
-    search_fields = (
-        "id__icontains",
-        "creator__username",
-        "staff_orders_handler__username",
-    )
+    search_fields = ("creator__username", "staff_orders_handler__username")
     readonly_fields = (
         "creator",
         "status",
@@ -63,9 +141,13 @@ class OrderAdmin(admin.ModelAdmin):
         "is_assigned",
         "assigned_staff_info",
         "created_at",
+        "reservation_expires_at",
         "completion_progress",
+        "total_quantity",
+        "total_price",
     )
     inlines = [OrderItemInline]
+    actions = ["cancel_orders"]
     base_fieldsets = (
         ("Basic Information", {"fields": ("creator", "status")}),
         (
@@ -74,7 +156,10 @@ class OrderAdmin(admin.ModelAdmin):
         ),
         (
             "Completion Progress",
-            {"fields": ("completion_progress",), "classes": ("collapse",)},
+            {
+                "fields": ("completion_progress", "total_quantity", "total_price"),
+                "classes": ("collapse",),
+            },
         ),
         (
             "Additional Information",
@@ -83,7 +168,7 @@ class OrderAdmin(admin.ModelAdmin):
         (
             "Timestamps",
             {
-                "fields": ("created_at",),
+                "fields": ("created_at", "reservation_expires_at"),
                 "classes": ("collapse",),
             },
         ),
@@ -91,8 +176,8 @@ class OrderAdmin(admin.ModelAdmin):
 
     def completion_status(self, obj):
         """Display completion status in list view."""
-        total_items = obj.items.count()
-        completed_items = obj.items.filter(is_completed=True).count()
+        total_items = obj.items_count
+        completed_items = obj.completed_items_count
         if total_items == 0:
             return "No items"
         return f"{completed_items}/{total_items} items completed"
@@ -101,8 +186,8 @@ class OrderAdmin(admin.ModelAdmin):
 
     def completion_progress(self, obj):
         """Display detailed completion progress."""
-        total_items = obj.items.count()
-        completed_items = obj.items.filter(is_completed=True).count()
+        total_items = obj.items_count
+        completed_items = obj.completed_items_count
 
         if total_items == 0:
             return "No items in this order"
@@ -118,6 +203,17 @@ class OrderAdmin(admin.ModelAdmin):
 
     completion_progress.short_description = "Completion Progress"
 
+    @admin.action(description="Cancel selected orders", permissions=["change"])
+    def cancel_orders(self, request, queryset):
+        """Cancel the selected open orders and release their reserved stock."""
+        orders = queryset.exclude(status__in=["completed", "cancelled"])
+        cancelled = 0
+        with transaction.atomic():
+            for order in orders:
+                order.cancel()
+                cancelled += 1
+        messages.success(request, f"Cancelled {cancelled} order(s).")
+
     def assigned_staff_info(self, obj):
         if obj.staff_orders_handler:
             return f"Assigned to: {obj.staff_orders_handler.get_full_name() or obj.staff_orders_handler.username}"
@@ -134,7 +230,7 @@ class OrderAdmin(admin.ModelAdmin):
 
         # Determine assignment fields based on user type and assignment status
         assignment_fields = ["is_assigned", "assigned_at"]
-        if not request.user.groups.filter(name="ORDERS_OPERATOR").exists():
+        if "ORDERS_OPERATOR" not in get_group_names(request):
             assignment_fields.insert(0, "staff_orders_handler")
         if obj and obj.is_assigned:
             assignment_fields.append("assigned_staff_info")
@@ -155,20 +251,20 @@ class OrderAdmin(admin.ModelAdmin):
         super().save_model(request, obj, form, change)
 
     def save_formset(self, request, form, formset, change):
-        """Override to update order status after saving order items."""
-        instances = formset.save(commit=False)
+        """
+        Override to update the order status once, after all of the order
+        items are saved.
+        """
+        with deferred_status_updates():
+            instances = formset.save(commit=False)
 
-        # Save the instances
-        for instance in instances:
-            instance.save()
+            # Save the instances
+            for instance in instances:
+                instance.save()
 
-        # Delete any objects marked for deletion
-        for obj in formset.deleted_objects:
-            obj.delete()
-
-        # Update the order status based on item completion
-        if form.instance.pk:
-            form.instance.save()  # This will trigger the status update logic
+            # Delete any objects marked for deletion
+            for obj in formset.deleted_objects:
+                obj.delete()
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
@@ -178,11 +274,11 @@ class OrderAdmin(admin.ModelAdmin):
             return qs
 
         # ORDERS_MANAGER group sees all orders as well
-        if request.user.groups.filter(name="ORDERS_MANAGER").exists():
+        if "ORDERS_MANAGER" in get_group_names(request):
             return qs
 
         # ORDERS_OPERATOR group sees only orders assigned to them
-        if request.user.groups.filter(name="ORDERS_OPERATOR").exists():
+        if "ORDERS_OPERATOR" in get_group_names(request):
             return qs.filter(staff_orders_handler=request.user)
 
         # Not in any allowed group
@@ -190,7 +286,7 @@ class OrderAdmin(admin.ModelAdmin):
 
 
 @admin.register(OrderItem, site=admin_site)
-class OrderItemAdmin(admin.ModelAdmin):
+class OrderItemAdmin(StockErrorMixin, OrderIdSearchMixin, admin.ModelAdmin):
     list_display = (
         "item",
         "order",
@@ -200,8 +296,10 @@ class OrderItemAdmin(admin.ModelAdmin):
         "is_completed",
         "order__created_at",
     )
+    list_select_related = ("item", "order__creator")
     list_filter = ("is_completed", "order__status", "order__created_at", "item__name")
-    search_fields = ("order__id__icontains", "order__short_id", "item__name")
+    search_fields = ("item__name",)
+    order_path = "order__"
     readonly_fields = ("price_at_time", "total_price")
     list_editable = ("is_completed",)  # Allow quick editing of completion status
 
@@ -258,6 +356,8 @@ class OrderItemAdmin(admin.ModelAdmin):
             old_order_status = obj.order.status
 
         super().save_model(request, obj, form, change)
+        # The status was recomputed in the database
+        obj.order.refresh_from_db(fields=["status"])
 
         # Check if the order status changed to completed
         if (
@@ -276,41 +376,35 @@ class OrderItemAdmin(admin.ModelAdmin):
         order = obj.order
 
         # Check if this is the last item in the order
-        if order.items.count() == 1:
+        if order.items_count == 1:
             messages.error(
                 request,
                 "Cannot delete the last item from an order. If you want to remove all items, please delete the order instead.",
             )
             return
 
-        # Safe to delete
+        # Safe to delete, deleting the item updates the order status
         super().delete_model(request, obj)
 
-        # Update order status after deletion
-        order.save()
-
     def delete_queryset(self, request, queryset):
         """Override bulk delete to prevent deletion that would leave orders empty."""
-        orders_to_check = {}
-        orders_to_update = set()
-
         # Count items per order that would be deleted
-        for item in queryset:
-            order_id = item.order.id
-            orders_to_update.add(item.order)
-            if order_id not in orders_to_check:
-                orders_to_check[order_id] = {
-                    "order": item.order,
-                    "total_items": item.order.items.count(),
-                    "items_to_delete": 0,
-                }
-            orders_to_check[order_id]["items_to_delete"] += 1
+        items_to_delete = {
+            order_id: counters["items_count"]
+            for order_id, counters in queryset.get_counters().items()
+        }
+        total_items = dict(
+            Order.objects.filter(pk__in=items_to_delete).values_list(
+                "pk", "items_count"
+            )
+        )
 
         # Check if any order would be left empty
-        problem_orders = []
-        for order_info in orders_to_check.values():
-            if order_info["total_items"] == order_info["items_to_delete"]:
-                problem_orders.append(order_info["order"].id)
+        problem_orders = [
+            order_id
+            for order_id, count in items_to_delete.items()
+            if total_items[order_id] == count
+        ]
 
         if problem_orders:
             messages.error(
@@ -320,9 +414,5 @@ class OrderItemAdmin(admin.ModelAdmin):
             )
             return
 
-        # Safe to delete
+        # Safe to delete, the order statuses are updated once per order
         super().delete_queryset(request, queryset)
-
-        # Update order statuses after bulk deletion
-        for order in orders_to_update:
-            order.save()
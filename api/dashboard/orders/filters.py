@@ -0,0 +1,19 @@
+import django_filters
+
+from .models import Order
+
+
+class OrderFilter(django_filters.FilterSet):
+    """
+    Filters for the order API. ``short_id`` matches the orders whose short
+    id starts with the given prefix, with an index seek.
+    """
+
+    short_id = django_filters.CharFilter(method="filter_short_id")
+
+    class Meta:
+        model = Order
+        fields = ["status"]
+
+    def filter_short_id(self, queryset, name, value):
+        return queryset.with_short_id_prefix(value)
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ...models import Order
+
+
+class Command(BaseCommand):
+    help = "Recompute the item counters and totals of every order from its items"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of orders to recount per transaction",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Recount the orders in batches of primary keys, each batch costing one
+        aggregate query and at most one bulk update.
+        """
+        recounted = fixed = 0
+        last_pk = None
+        while True:
+            orders = Order.objects.order_by("pk")
+            if last_pk is not None:
+                orders = orders.filter(pk__gt=last_pk)
+            batch = list(orders.values_list("pk", flat=True)[: options["batch_size"]])
+            if not batch:
+                break
+            with transaction.atomic():
+                fixed += (
+                    Order.objects.filter(pk__in=batch).select_for_update().recount()
+                )
+            recounted += len(batch)
+            last_pk = batch[-1]
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Recounted {recounted} order(s), {fixed} of which were off."
+            )
+        )
@@ -0,0 +1,80 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections, router, transaction
+from django.db.models.functions import Now
+from django.utils import timezone
+
+from ...models import Order, OrderItem
+
+
+class Command(BaseCommand):
+    help = (
+        "Cancel the pending orders whose reservation has expired, releasing "
+        "their stock"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of orders to cancel per transaction",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Keep running, sweeping every INTERVAL seconds",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            released = self.sweep(options["batch_size"])
+            if released or options["verbosity"] > 1:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Cancelled {released} expired order(s), releasing their stock."
+                    )
+                )
+            if not options["interval"]:
+                return
+            try:
+                time.sleep(options["interval"])
+            except KeyboardInterrupt:
+                return
+
+    def sweep(self, batch_size):
+        """
+        Cancel expired orders in batches, each in its own transaction: one
+        UPDATE of the stock items, one of the order items and one of the
+        orders per batch. Expired orders are cancelled rather than left
+        pending, so that a later save doesn't quietly reserve their stock
+        again.
+
+        Where the database supports it (PostgreSQL), the batch is claimed with
+        ``SELECT ... FOR UPDATE SKIP LOCKED``, so several sweepers can run side
+        by side and orders being saved meanwhile are left for the next sweep.
+        SQLite has no row locks; its database-wide write lock serializes
+        sweepers and order saves instead, so one sweeper at a time is enough.
+        """
+        db = router.db_for_write(Order)
+        skip_locked = connections[db].features.has_select_for_update_skip_locked
+        now = timezone.now()
+        released = 0
+        while True:
+            with transaction.atomic(using=db):
+                batch = list(
+                    Order.objects.using(db)
+                    .reservation_expired(now)
+                    .select_for_update(skip_locked=skip_locked)
+                    .order_by("reservation_expires_at")
+                    .values_list("pk", flat=True)[:batch_size]
+                )
+                if not batch:
+                    return released
+                OrderItem.objects.using(db).filter(order__in=batch).release_stock()
+                Order.objects.using(db).filter(pk__in=batch).update(
+                    status="cancelled", reservation_expires_at=None, updated_at=Now()
+                )
+            released += len(batch)
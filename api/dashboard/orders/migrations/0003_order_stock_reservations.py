@@ -0,0 +1,31 @@
+# Generated by Django 5.2.3 on 2026-10-17 03:54
+
+from django.db import migrations, models
+
+
+def mark_completed_orders_consumed(apps, schema_editor):
+    # Orders completed before stock was tracked must not be taken out of stock
+    # again.
+    Order = apps.get_model('orders', 'Order')
+    Order.objects.filter(status='completed').update(stock_consumed=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_alter_order_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='stock_consumed',
+            field=models.BooleanField(default=False, editable=False, help_text='Whether the ordered items have been taken out of stock'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='reserved_quantity',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Quantity of this item currently reserved in stock for the order'),
+        ),
+        migrations.RunPython(mark_completed_orders_consumed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 03:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_order_stock_reservations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='reservation_expires_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, help_text='When the stock reserved for this pending order is released', null=True),
+        ),
+    ]
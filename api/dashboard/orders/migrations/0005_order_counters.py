@@ -0,0 +1,65 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:08
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def count_order_items(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    rows = (
+        OrderItem.objects.order_by()
+        .values('order')
+        .annotate(
+            items_count=Count('pk'),
+            completed_items_count=Count('pk', filter=Q(is_completed=True)),
+            total_quantity=Sum('quantity'),
+            total_price=Coalesce(
+                Sum(F('price_at_time') * F('quantity')),
+                Value(Decimal(0)),
+                output_field=models.DecimalField(max_digits=12, decimal_places=2),
+            ),
+        )
+    )
+    fields = ['items_count', 'completed_items_count', 'total_quantity', 'total_price']
+    orders = []
+    for row in rows:
+        order = Order(pk=row.pop('order'))
+        for field, value in row.items():
+            setattr(order, field, value)
+        orders.append(order)
+    Order.objects.bulk_update(orders, fields, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_order_reservation_expires_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='completed_items_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of completed items in the order'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='items_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of items in the order'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='total_price',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Total price of the order, at the prices of the time', max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='total_quantity',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Total quantity of the items ordered'),
+        ),
+        migrations.RunPython(count_order_items, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:10
+
+from django.db import migrations, models
+from django.db.models.functions import Cast, Left, Upper
+
+
+def set_short_ids(apps, schema_editor):
+    # The first 8 characters of the UUID are the same whether the database
+    # stores it with hyphens or without, so one UPDATE does it.
+    Order = apps.get_model('orders', 'Order')
+    Order.objects.update(
+        short_id=Upper(Left(Cast('id', output_field=models.CharField()), 8))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_order_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='short_id',
+            field=models.CharField(db_index=True, default='', editable=False, help_text='Shortened, upper case order identifier, for display and search', max_length=8),
+        ),
+        migrations.RunPython(set_short_ids, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 5.2.3 on 2026-10-17 09:40
+
+from django.db import migrations
+from django.db.models import F, Sum
+from django.utils import timezone
+
+
+def reserve_open_orders(apps, schema_editor):
+    # Pending and in progress orders placed before reservations were tracked
+    # hold nothing, so their first save would reserve their stock on top of
+    # what the stock rows already count. Reservations that the rows count
+    # without a tracked order behind them (they used to be entered by hand)
+    # are taken to be theirs; the rest is reserved now from what is
+    # available, oldest orders first. Whatever the stock can't cover stays
+    # unreserved and is reported when the order is next saved.
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    StockItem = apps.get_model('stock', 'StockItem')
+    StockMovement = apps.get_model('stock', 'StockMovement')
+    StockReservationStripe = apps.get_model('stock', 'StockReservationStripe')
+
+    open_items = list(
+        OrderItem.objects.filter(
+            order__status__in=('pending', 'in_progress'),
+            order__stock_consumed=False,
+            reserved_quantity__lt=F('quantity'),
+        ).order_by('order__created_at', 'pk')
+    )
+    if not open_items:
+        return
+    stock_ids = {item.item_id for item in open_items}
+
+    tracked = dict(
+        OrderItem.objects.filter(item__in=stock_ids)
+        .order_by()
+        .values('item')
+        .annotate(total=Sum('reserved_quantity'))
+        .values_list('item', 'total')
+    )
+    # Allotments count as reserved on the item rows until stripes use them.
+    unused_allotments = dict(
+        StockReservationStripe.objects.filter(item__in=stock_ids)
+        .order_by()
+        .values('item')
+        .annotate(total=Sum(F('allotment') - F('reserved_quantity')))
+        .values_list('item', 'total')
+    )
+    stock, untracked = {}, {}
+    for pk, quantity, reserved in StockItem.objects.filter(pk__in=stock_ids).values_list(
+        'pk', 'quantity', 'reserved_quantity'
+    ):
+        stock[pk] = quantity - reserved
+        untracked[pk] = max(0, reserved - unused_allotments.get(pk, 0) - tracked.get(pk, 0))
+
+    reserved_now, movements = {}, []
+    for item in open_items:
+        needed = item.quantity - item.reserved_quantity
+        adopted = min(needed, untracked[item.item_id])
+        untracked[item.item_id] -= adopted
+        taken = min(needed - adopted, max(0, stock[item.item_id]))
+        stock[item.item_id] -= taken
+        item.reserved_quantity += adopted + taken
+        if taken:
+            reserved_now[item.item_id] = reserved_now.get(item.item_id, 0) + taken
+            movements.append(
+                StockMovement(
+                    item_id=item.item_id,
+                    kind='reservation',
+                    reserved_delta=taken,
+                    reference=str(item.order_id),
+                )
+            )
+
+    OrderItem.objects.bulk_update(open_items, ['reserved_quantity'], batch_size=500)
+    now = timezone.now()
+    for pk, quantity in reserved_now.items():
+        StockItem.objects.filter(pk=pk).update(
+            reserved_quantity=F('reserved_quantity') + quantity, updated_at=now
+        )
+    StockMovement.objects.bulk_create(movements, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_order_short_id'),
+        ('stock', '0008_stock_reservation_stripes'),
+    ]
+
+    operations = [
+        migrations.RunPython(reserve_open_orders, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,17 @@
+import re
 import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+from decimal import Decimal
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 from dashboard.stock.models import StockItem
@@ -10,6 +19,227 @@ from home.globals.models import AbstractCreatedAtUpdatedAt
 
 User = get_user_model()
 
+# Statuses in which an order holds its items in reserve.
+RESERVING_STATUSES = ("pending", "in_progress")
+
+# Order fields summing up the items of the order, kept up to date by them.
+COUNTER_FIELDS = (
+    "items_count",
+    "completed_items_count",
+    "total_quantity",
+    "total_price",
+)
+
+# Short order ids are the first 8 hex digits of the UUID, in upper case.
+SHORT_ID_LENGTH = 8
+SHORT_ID_PREFIX = re.compile(r"#?([0-9a-fA-F]{1,%d})" % SHORT_ID_LENGTH)
+
+# Orders whose items changed in the current deferred block, with the changes
+# to make to their counters.
+_dirty_orders = ContextVar("dirty_orders", default=None)
+
+# Orders whose status is left to refresh when the current transaction commits.
+_pending_orders = ContextVar("pending_orders", default=None)
+
+
+@contextmanager
+def deferred_status_updates():
+    """
+    Run the block in a transaction in which order item changes only mark
+    their orders dirty. At the end, each dirty order has its counters
+    updated with one UPDATE, in the same transaction. Once that transaction
+    commits, each order has its status recomputed and its stock reservations
+    synced once, however many of its items changed and however many blocks
+    changed them (see ``OrderQuerySet.refresh_status``). A rollback drops
+    the refresh along with the changes.
+
+    Nested blocks defer to the outermost one.
+    """
+    if _dirty_orders.get() is not None:
+        yield
+        return
+
+    if not transaction.get_connection().in_atomic_block:
+        # Anything still pending belongs to a transaction that rolled back.
+        _pending_orders.set(None)
+
+    dirty = {}
+    token = _dirty_orders.set(dirty)
+    try:
+        with transaction.atomic():
+            yield
+            _dirty_orders.reset(token)
+            token = None
+            for order_id, deltas in dirty.items():
+                changes = {field: F(field) + delta for field, delta in deltas.items()}
+                if any(deltas.values()):
+                    Order.objects.filter(pk=order_id).update(**changes)
+            if dirty:
+                pending = _pending_orders.get()
+                if pending is None:
+                    pending = set()
+                    _pending_orders.set(pending)
+                pending.update(dirty)
+                transaction.on_commit(_refresh_pending_orders)
+    finally:
+        if token is not None:
+            _dirty_orders.reset(token)
+
+
+def _refresh_pending_orders():
+    """
+    Refresh the orders changed in the transaction that just committed. Each
+    block registers this, the first call refreshes them all.
+    """
+    pending = _pending_orders.get()
+    if not pending:
+        return
+    order_ids = set(pending)
+    pending.clear()
+    with transaction.atomic():
+        Order.objects.filter(pk__in=order_ids).refresh_status()
+
+
+def mark_orders_dirty(*order_ids, **deltas):
+    """
+    Have the enclosing ``deferred_status_updates`` block refresh orders,
+    adding ``deltas`` to their counters (see ``COUNTER_FIELDS``).
+    """
+    dirty = _dirty_orders.get()
+    for order_id in order_ids:
+        dirty.setdefault(order_id, Counter()).update(deltas)
+
+
+def short_id_prefix_q(term, field="short_id"):
+    """
+    Return a ``Q`` matching the short ids starting with ``term``, or ``None``
+    if ``term`` can't start a short id.
+
+    The prefix is matched as the range ``[prefix, prefix + "Z")`` of the
+    short id column rather than with ``LIKE``, so that it is an index seek
+    on every database, whatever its collation or case sensitivity.
+    """
+    match = SHORT_ID_PREFIX.fullmatch(term.strip())
+    if not match:
+        return None
+    prefix = match[1].upper()
+    if len(prefix) == SHORT_ID_LENGTH:
+        return Q(**{field: prefix})
+    return Q(**{f"{field}__gte": prefix, f"{field}__lt": prefix + "Z"})
+
+
+def item_counters(quantity, is_completed, price_at_time, sign=1):
+    """What an order item with these values adds to its order's counters."""
+    return {
+        "items_count": sign,
+        "completed_items_count": sign if is_completed else 0,
+        "total_quantity": sign * quantity,
+        "total_price": sign * quantity * (price_at_time or 0),
+    }
+
+
+class OrderItemQuerySet(models.QuerySet):
+    def release_stock(self):
+        """
+        Release the stock reserved by these order items, with one UPDATE for
+        the stock items and one for the order items.
+        """
+        held = self.filter(reserved_quantity__gt=0)
+        quantities = dict(
+            held.order_by()
+            .values("item")
+            .annotate(total=Sum("reserved_quantity"))
+            .values_list("item", "total")
+        )
+        if quantities:
+            StockItem.objects.release(quantities)
+            held.update(reserved_quantity=0)
+
+    def get_counters(self):
+        """
+        Return what these order items add to the counters of their orders,
+        as ``{order id: {counter field: value}}``, in one query.
+        """
+        rows = (
+            self.order_by()
+            .values("order")
+            .annotate(
+                items_count=Count("pk"),
+                completed_items_count=Count("pk", filter=Q(is_completed=True)),
+                total_quantity=Sum("quantity"),
+                total_price=Coalesce(
+                    Sum(F("price_at_time") * F("quantity")),
+                    Value(Decimal(0)),
+                    output_field=DecimalField(max_digits=12, decimal_places=2),
+                ),
+            )
+        )
+        return {row.pop("order"): row for row in rows}
+
+    def delete(self):
+        # The stock is released for all of the items at once, which leaves
+        # the per-item receivers in .signals nothing to release.
+        with deferred_status_updates():
+            self.release_stock()
+            return super().delete()
+
+
+class OrderQuerySet(models.QuerySet):
+    def reservation_expired(self, now=None):
+        """Pending orders whose reservation has run out."""
+        return self.filter(
+            status="pending", reservation_expires_at__lte=now or timezone.now()
+        )
+
+    def with_short_id_prefix(self, term):
+        """Orders whose short id starts with ``term``, see ``short_id_prefix_q``."""
+        q = short_id_prefix_q(term)
+        return self.none() if q is None else self.filter(q)
+
+    def refresh_status(self):
+        """
+        Recompute the status of these orders from their item counters and
+        write only the statuses that changed, in one bulk update. The stock
+        reservations of every order are synced.
+        """
+        orders = list(self)
+        changed = []
+        for order in orders:
+            status = order.status
+            order.update_status_based_on_items()
+            if order.status != status:
+                order.updated_at = timezone.now()
+                changed.append(order)
+        Order.objects.bulk_update(changed, ["status", "updated_at"])
+
+        for order in orders:
+            order.sync_stock_reservations()
+
+    def recount(self):
+        """
+        Recompute the counters of these orders from their items, in one
+        aggregate query, and write those that were off in one bulk update.
+        Returns the number of orders fixed.
+        """
+        counters = OrderItem.objects.filter(order__in=self).get_counters()
+        fixed = []
+        for order in self.only("pk", *COUNTER_FIELDS):
+            values = counters.get(order.pk, {})
+            if any(
+                getattr(order, field) != values.get(field, 0)
+                for field in COUNTER_FIELDS
+            ):
+                for field in COUNTER_FIELDS:
+                    setattr(order, field, values.get(field, 0))
+                fixed.append(order)
+        Order.objects.bulk_update(fixed, COUNTER_FIELDS)
+        return len(fixed)
+
+    def delete(self):
+        with deferred_status_updates():
+            OrderItem.objects.filter(order__in=self).release_stock()
+            return super().delete()
+
 
 class Order(AbstractCreatedAtUpdatedAt):
     # Custom UUID primary key
@@ -19,6 +249,13 @@ class Order(AbstractCreatedAtUpdatedAt):
         editable=False,
         help_text="Unique order identifier",
     )
+    short_id = models.CharField(
+        max_length=SHORT_ID_LENGTH,
+        default="",
+        editable=False,
+        db_index=True,
+        help_text="Shortened, upper case order identifier, for display and search",
+    )
 
     class Meta:
         ordering = [
@@ -67,6 +304,36 @@ class Order(AbstractCreatedAtUpdatedAt):
         help_text="When the order was assigned to staff",
     )
     notes = models.TextField(blank=True, help_text="Internal notes about the order")
+    stock_consumed = models.BooleanField(
+        default=False,
+        editable=False,
+        help_text="Whether the ordered items have been taken out of stock",
+    )
+    reservation_expires_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+        help_text="When the stock reserved for this pending order is released",
+    )
+    items_count = models.PositiveIntegerField(
+        default=0, editable=False, help_text="Number of items in the order"
+    )
+    completed_items_count = models.PositiveIntegerField(
+        default=0, editable=False, help_text="Number of completed items in the order"
+    )
+    total_quantity = models.PositiveIntegerField(
+        default=0, editable=False, help_text="Total quantity of the items ordered"
+    )
+    total_price = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text="Total price of the order, at the prices of the time",
+    )
+
+    objects = OrderQuerySet.as_manager()
 
     def __str__(self):
         return f"Order #{str(self.id)[:8]} by {self.creator.username} - {self.get_status_display()}"
@@ -89,9 +356,7 @@ class Order(AbstractCreatedAtUpdatedAt):
 
     def are_all_items_completed(self):
         """Check if all order items are completed."""
-        if not self.items.exists():
-            return False
-        return self.items.filter(is_completed=False).count() == 0
+        return 0 < self.items_count == self.completed_items_count
 
     def update_status_based_on_items(self):
         """Update order status based on item completion."""
@@ -103,42 +368,136 @@ class Order(AbstractCreatedAtUpdatedAt):
             self.status = "pending"
 
     def save(self, *args, **kwargs):
+        """
+        Save the order, recomputing its status. Its stock reservations are
+        only synced when the status changes: item changes sync them on their
+        own (see ``deferred_status_updates``), and an edit to other fields
+        must neither cost the sync's queries nor extend a pending order's
+        reservation.
+        """
         # Automatically set is_assigned based on staff handler
-        self.is_assigned = True if self.staff_orders_handler else False
+        self.is_assigned = self.staff_orders_handler_id is not None
 
         # Automatically set assigned_at if staff handler is set
-        if self.staff_orders_handler and not self.assigned_at:
+        if self.is_assigned and not self.assigned_at:
             self.assigned_at = timezone.now()
 
         # Clear assigned_at if unassigned
-        if not self.staff_orders_handler and self.assigned_at:
+        if not self.is_assigned and self.assigned_at:
             self.assigned_at = None
 
-        # Call super().save() first to ensure self.pk exists before accessing reverse relationships
-        is_new = self.pk is None
-        super().save(*args, **kwargs)
-
-        # After initial save, update status based on item completion
-        if not is_new:
-            self.update_status_based_on_items()
-            # Save again if status was modified
-            super().save(update_fields=["status"])
+        if not self.short_id:
+            self.short_id = self.make_short_id()
+
+        with transaction.atomic():
+            # A new order has no items to base its status on yet.
+            saved = None
+            if not self._state.adding:
+                # The counters are kept up to date in the database by the
+                # items, so they must not be overwritten either.
+                saved = (
+                    Order.objects.filter(pk=self.pk)
+                    .values("status", *COUNTER_FIELDS)
+                    .first()
+                )
+                if saved is not None:
+                    for field in COUNTER_FIELDS:
+                        setattr(self, field, saved[field])
+                self.update_status_based_on_items()
+                if kwargs.get("update_fields") is not None:
+                    kwargs["update_fields"] = {*kwargs["update_fields"], "status"}
+                else:
+                    kwargs["update_fields"] = [
+                        field.name
+                        for field in self._meta.concrete_fields
+                        if not field.primary_key and field.name not in COUNTER_FIELDS
+                    ]
+            super().save(*args, **kwargs)
+
+            if saved is not None and saved["status"] != self.status:
+                self.sync_stock_reservations()
+
+    def delete(self, *args, **kwargs):
+        with deferred_status_updates():
+            self.items.all().release_stock()
+            return super().delete(*args, **kwargs)
+
+    def cancel(self):
+        """Cancel the order, releasing the stock reserved for it."""
+        self.status = "cancelled"
+        self.save()
+
+    def sync_stock_reservations(self):
+        """
+        Bring the stock held for this order in line with its status:
+
+        - pending and in progress orders reserve the quantity of every item,
+          for ``ORDER_RESERVATION_TTL`` seconds from the last change while
+          pending, after which the ``sweep_reservations`` command cancels
+          the order;
+        - cancelled orders hold nothing;
+        - completed orders take their items out of stock, once.
+
+        Whatever the number of items, this is at most one UPDATE of the stock
+        per direction and one bulk update of the order items. Raises
+        ``InsufficientStockError`` if the stock can't cover the order.
+        """
+        with transaction.atomic():
+            items = list(
+                self.items.select_for_update().only(
+                    "id", "order_id", "item_id", "quantity", "reserved_quantity"
+                )
+            )
+
+            consuming = self.status == "completed" and not self.stock_consumed
+            if consuming:
+                StockItem.objects.consume(
+                    {item.item_id: item.quantity for item in items},
+                    reserved={item.item_id: item.reserved_quantity for item in items},
+                    reference=str(self.pk),
+                )
+                Order.objects.filter(pk=self.pk).update(stock_consumed=True)
+                self.stock_consumed = True
+
+            holds_stock = self.status in RESERVING_STATUSES and not self.stock_consumed
+            to_reserve, to_release, changed = {}, {}, []
+            for item in items:
+                target = item.quantity if holds_stock else 0
+                delta = target - item.reserved_quantity
+                if not delta:
+                    continue
+                if delta > 0:
+                    to_reserve[item.item_id] = delta
+                elif not consuming:
+                    to_release[item.item_id] = -delta
+                item.reserved_quantity = target
+                changed.append(item)
+
+            StockItem.objects.release(to_release, reference=str(self.pk))
+            StockItem.objects.reserve(to_reserve, reference=str(self.pk))
+            OrderItem.objects.bulk_update(changed, ["reserved_quantity"])
+
+            expires_at = None
+            ttl = getattr(settings, "ORDER_RESERVATION_TTL", None)
+            if ttl and self.status == "pending" and holds_stock and items:
+                expires_at = timezone.now() + timedelta(seconds=ttl)
+            if expires_at or self.reservation_expires_at:
+                Order.objects.filter(pk=self.pk).update(
+                    reservation_expires_at=expires_at
+                )
+                self.reservation_expires_at = expires_at
 
     def get_total_items(self):
         """Get total number of items in the order."""
-        return sum(item.quantity for item in self.items.all())
+        return self.total_quantity
 
     def get_total_price(self):
-        """Calculate total price of the order."""
-        total = 0
-        for order_item in self.items.all():
-            total += order_item.total_price
-        return total
+        """Get total price of the order."""
+        return self.total_price
 
-    @property
-    def short_id(self):
+    def make_short_id(self):
         """Return a shortened version of the UUID for display purposes."""
-        return str(self.id)[:8].upper()
+        return str(self.id)[:SHORT_ID_LENGTH].upper()
 
 
 class OrderItem(models.Model):
@@ -177,6 +536,13 @@ class OrderItem(models.Model):
         default=False,
         help_text="Whether this item has been completed or fulfilled",
     )
+    reserved_quantity = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Quantity of this item currently reserved in stock for the order",
+    )
+
+    objects = OrderItemQuerySet.as_manager()
 
     class Meta:
         unique_together = ["order", "item"]
@@ -184,15 +550,65 @@ class OrderItem(models.Model):
     def __str__(self):
         return f"{self.quantity} x {self.item.name}"
 
+    def clean(self):
+        super().clean()
+
+        if not self.item_id or (
+            self.order_id and self.order.status not in RESERVING_STATUSES
+        ):
+            return
+        needed = self.quantity - self.reserved_quantity
+        available = self.item.available_quantity
+        if needed > available:
+            raise ValidationError(
+                {"quantity": f"Only {available} more of {self.item.name} in stock"}
+            )
+
     def save(self, *args, **kwargs):
         """Save the current price when creating the order item."""
         if not self.price_at_time and self.item.current_price:
             self.price_at_time = self.item.current_price
 
-        super().save(*args, **kwargs)
-
-        # Update the order status after saving the item
-        self.order.save()
+        # The reserved quantity belongs to the order's stock sync, which
+        # updates the rows in bulk, so updates must not overwrite it.
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "reserved_quantity"
+            ]
+
+        with deferred_status_updates():
+            old = None
+            if not self._state.adding:
+                old = (
+                    OrderItem.objects.select_for_update()
+                    .filter(pk=self.pk)
+                    .values(
+                        "order", "item", "quantity", "is_completed", "price_at_time"
+                    )
+                    .first()
+                )
+            if old and old.pop("item") != self.item_id:
+                # The reservation is for the item the row had; give it back
+                # before the row moves on, the order sync reserves the new one.
+                OrderItem.objects.filter(pk=self.pk).release_stock()
+                self.reserved_quantity = 0
+            super().save(*args, **kwargs)
+
+            # Update the order counters and status once the changes are in
+            if old:
+                mark_orders_dirty(old.pop("order"), **item_counters(**old, sign=-1))
+            mark_orders_dirty(
+                self.order_id,
+                **item_counters(self.quantity, self.is_completed, self.price_at_time),
+            )
+
+    def delete(self, *args, **kwargs):
+        with deferred_status_updates():
+            OrderItem.objects.filter(pk=self.pk).release_stock()
+            self.reserved_quantity = 0
+            return super().delete(*args, **kwargs)
 
     @property
     def total_price(self):
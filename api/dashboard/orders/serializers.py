@@ -0,0 +1,136 @@
+from django.db import transaction
+from rest_framework import serializers
+
+from dashboard.stock.models import InsufficientStockError, StockItem
+
+from .models import Order, OrderItem, item_counters
+
+
+class OrderItemSerializer(serializers.ModelSerializer):
+    """Serializer for OrderItem model."""
+
+    total_price = serializers.DecimalField(
+        max_digits=12, decimal_places=2, read_only=True
+    )
+
+    class Meta:
+        model = OrderItem
+        fields = ["id", "item", "quantity", "price_at_time", "total_price"]
+
+
+class OrderSerializer(serializers.ModelSerializer):
+    """Serializer for Order model, with its items."""
+
+    short_id = serializers.CharField(read_only=True)
+    items = OrderItemSerializer(many=True, read_only=True)
+    total_price = serializers.DecimalField(
+        max_digits=12, decimal_places=2, read_only=True
+    )
+
+    class Meta:
+        model = Order
+        fields = [
+            "id",
+            "short_id",
+            "status",
+            "notes",
+            "items",
+            "total_quantity",
+            "total_price",
+            "created_at",
+        ]
+
+
+class OrderLineSerializer(serializers.Serializer):
+    item = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class OrderCreateSerializer(serializers.Serializer):
+    """
+    Places an order for a cart of ``{"item": id, "quantity": n}`` lines.
+
+    The stock items are fetched in one query, the order items are written
+    with one ``bulk_create`` and the stock for all of them is reserved once,
+    at the end - so placing an order costs the same number of queries
+    whatever the size of the cart.
+    """
+
+    items = OrderLineSerializer(many=True, allow_empty=False)
+    notes = serializers.CharField(required=False, allow_blank=True, default="")
+
+    def validate_items(self, lines):
+        quantities = {}
+        for line in lines:
+            quantities[line["item"]] = (
+                quantities.get(line["item"], 0) + line["quantity"]
+            )
+
+        stock_items = StockItem.objects.filter(
+            is_active=True, category__is_active=True
+        ).in_bulk(quantities)
+
+        errors = {}
+        for pk, quantity in quantities.items():
+            stock_item = stock_items.get(pk)
+            if stock_item is None:
+                errors[pk] = "Item not found."
+            elif quantity < stock_item.min_order_quantity:
+                errors[pk] = (
+                    f"At least {stock_item.min_order_quantity} of "
+                    f"{stock_item.name} must be ordered."
+                )
+            elif (
+                stock_item.max_order_quantity
+                and quantity > stock_item.max_order_quantity
+            ):
+                errors[pk] = (
+                    f"At most {stock_item.max_order_quantity} of "
+                    f"{stock_item.name} can be ordered."
+                )
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        return [
+            {"item": stock_items[pk], "quantity": quantity}
+            for pk, quantity in quantities.items()
+        ]
+
+    def create(self, validated_data):
+        order = Order(
+            creator=validated_data.get("creator"), notes=validated_data["notes"]
+        )
+        order.short_id = order.make_short_id()
+        # The order items are bulk created, so the order is created with
+        # their counters already added up.
+        for line in validated_data["items"]:
+            counters = item_counters(
+                line["quantity"], False, line["item"].current_price
+            )
+            for field, value in counters.items():
+                setattr(order, field, getattr(order, field) + value)
+        try:
+            with transaction.atomic():
+                # The order has no items yet, so there is no stock to reserve
+                # until they are all in. A new order is pending, unassigned.
+                Order.objects.bulk_create([order])
+                OrderItem.objects.bulk_create(
+                    OrderItem(
+                        order=order,
+                        item=line["item"],
+                        quantity=line["quantity"],
+                        price_at_time=line["item"].current_price,
+                    )
+                    for line in validated_data["items"]
+                )
+                order.sync_stock_reservations()
+        except InsufficientStockError as e:
+            raise serializers.ValidationError(
+                {
+                    "items": {
+                        pk: f"Exceeds the stock available by {missing}."
+                        for pk, missing in e.shortages.items()
+                    }
+                }
+            )
+        return order
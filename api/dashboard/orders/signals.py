@@ -0,0 +1,39 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import receiver
+
+from dashboard.stock.models import StockCategory, StockItem
+
+from .models import OrderItem, deferred_status_updates, item_counters, mark_orders_dirty
+
+
+@receiver(pre_delete, sender=OrderItem, dispatch_uid="orders_release_deleted_item")
+def release_deleted_order_item(sender, instance, origin=None, **kwargs):
+    """
+    Release the stock held by order items deleted by a cascade, e.g. with the
+    user who placed the order. The ``delete()`` overrides release it for all
+    of their items beforehand, so there's nothing left to release for those.
+
+    Items deleted along with their stock item have nothing to give back to.
+    """
+    if not instance.reserved_quantity:
+        return
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin_model in (StockItem, StockCategory):
+        return
+    OrderItem.objects.filter(pk=instance.pk).release_stock()
+
+
+@receiver(post_delete, sender=OrderItem, dispatch_uid="orders_count_deleted_item")
+def count_deleted_order_item(sender, instance, **kwargs):
+    """Take deleted order items out of the counters and status of their order."""
+    with deferred_status_updates():
+        mark_orders_dirty(
+            instance.order_id,
+            **item_counters(
+                instance.quantity,
+                instance.is_completed,
+                instance.price_at_time,
+                sign=-1,
+            ),
+        )
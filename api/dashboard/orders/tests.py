@@ -0,0 +1,273 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from dashboard.stock.models import StockCategory, StockItem
+
+from .models import (
+    Order,
+    OrderItem,
+    _refresh_pending_orders,
+    deferred_status_updates,
+)
+
+User = get_user_model()
+
+
+class OrderTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("customer", password="password")
+        category = StockCategory.objects.create(name="Stationery")
+        cls.pen = StockItem.objects.create(
+            category=category, name="Pen", quantity=10, original_price=2
+        )
+        cls.pad = StockItem.objects.create(
+            category=category, name="Pad", quantity=5, original_price=3
+        )
+
+    def place_order(self, *lines):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(creator=self.user)
+            for item, quantity in lines:
+                OrderItem.objects.create(order=order, item=item, quantity=quantity)
+        order.refresh_from_db()
+        return order
+
+    def assertStock(self, item, quantity, reserved):
+        item.refresh_from_db()
+        self.assertEqual((item.quantity, item.reserved_quantity), (quantity, reserved))
+
+
+class OrderSaveTests(OrderTestCase):
+    def test_edit_without_status_change_skips_stock_sync(self):
+        order = self.place_order((self.pen, 2))
+        expires_at = order.reservation_expires_at
+
+        order.notes = "Leave at the gate"
+        with self.assertNumQueries(4):  # savepoint, read, update, release
+            order.save()
+
+        order.refresh_from_db()
+        self.assertEqual(order.notes, "Leave at the gate")
+        self.assertEqual(order.reservation_expires_at, expires_at)
+        self.assertStock(self.pen, 10, 2)
+
+    def test_status_change_syncs_stock(self):
+        order = self.place_order((self.pen, 2))
+
+        order.cancel()
+
+        self.assertStock(self.pen, 10, 0)
+        self.assertEqual(order.items.get().reserved_quantity, 0)
+
+
+class OrderLifecycleTests(OrderTestCase):
+    def complete(self, order):
+        order.staff_orders_handler = self.user
+        order.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            for item in order.items.all():
+                item.is_completed = True
+                item.save()
+        order.refresh_from_db()
+
+    def test_placing_items_reserves_stock(self):
+        order = self.place_order((self.pen, 2), (self.pad, 1))
+
+        self.assertEqual(order.status, "pending")
+        self.assertIsNotNone(order.reservation_expires_at)
+        self.assertStock(self.pen, 10, 2)
+        self.assertStock(self.pad, 5, 1)
+
+    def test_cancelling_releases_stock(self):
+        order = self.place_order((self.pen, 2), (self.pad, 1))
+
+        order.cancel()
+
+        self.assertIsNone(order.reservation_expires_at)
+        self.assertStock(self.pen, 10, 0)
+        self.assertStock(self.pad, 5, 0)
+
+    def test_completing_consumes_stock_once(self):
+        order = self.place_order((self.pen, 2), (self.pad, 1))
+
+        self.complete(order)
+
+        self.assertEqual(order.status, "completed")
+        self.assertTrue(order.stock_consumed)
+        self.assertStock(self.pen, 8, 0)
+        self.assertStock(self.pad, 4, 0)
+
+        order.notes = "Delivered"
+        order.save()
+        self.assertStock(self.pen, 8, 0)
+
+    def test_deleting_releases_stock(self):
+        order = self.place_order((self.pen, 2))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order.delete()
+
+        self.assertStock(self.pen, 10, 0)
+
+    def test_item_changes_move_reservation(self):
+        order = self.place_order((self.pen, 2))
+        line = order.items.get()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            line.item = self.pad
+            line.quantity = 3
+            line.save()
+
+        self.assertStock(self.pen, 10, 0)
+        self.assertStock(self.pad, 5, 3)
+
+
+class DeferredStatusUpdateTests(OrderTestCase):
+    def test_refresh_runs_once_after_commit(self):
+        order = self.place_order()
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                with deferred_status_updates():
+                    OrderItem.objects.create(order=order, item=self.pen, quantity=2)
+                with deferred_status_updates():
+                    OrderItem.objects.create(order=order, item=self.pad, quantity=1)
+                self.assertStock(self.pen, 10, 0)
+
+        self.assertStock(self.pen, 10, 0)
+        refreshes = [c for c in callbacks if c is _refresh_pending_orders]
+        self.assertEqual(len(refreshes), 2)
+        refreshes[0]()
+        with self.assertNumQueries(0):
+            refreshes[1]()
+        self.assertStock(self.pen, 10, 2)
+        self.assertStock(self.pad, 5, 1)
+        order.refresh_from_db()
+        self.assertEqual(order.items_count, 2)
+
+    def test_rollback_drops_refresh(self):
+        order = self.place_order()
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    OrderItem.objects.create(order=order, item=self.pen, quantity=2)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+
+        self.assertEqual(callbacks, [])
+        self.assertStock(self.pen, 10, 0)
+        self.assertFalse(order.items.exists())
+
+
+class SweepReservationsTests(OrderTestCase):
+    def sweep(self):
+        call_command("sweep_reservations", stdout=StringIO())
+
+    def test_cancels_expired_orders(self):
+        expired = self.place_order((self.pen, 2))
+        current = self.place_order((self.pen, 3), (self.pad, 1))
+        Order.objects.filter(pk=expired.pk).update(
+            reservation_expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+        self.sweep()
+
+        expired.refresh_from_db()
+        current.refresh_from_db()
+        self.assertEqual(expired.status, "cancelled")
+        self.assertIsNone(expired.reservation_expires_at)
+        self.assertEqual(expired.items.get().reserved_quantity, 0)
+        self.assertEqual(current.status, "pending")
+        self.assertStock(self.pen, 10, 3)
+        self.assertStock(self.pad, 5, 1)
+
+    def test_cancelled_orders_stay_released(self):
+        order = self.place_order((self.pen, 2))
+        Order.objects.filter(pk=order.pk).update(
+            reservation_expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.sweep()
+
+        order.refresh_from_db()
+        order.notes = "Changed my mind"
+        order.save()
+
+        self.assertEqual(order.status, "cancelled")
+        self.assertStock(self.pen, 10, 0)
+
+
+class OrderPlacementTests(OrderTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.ruler = StockItem.objects.create(
+            category=cls.pen.category, name="Ruler", quantity=4, original_price=1
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.defaults["HTTP_HOST"] = "localhost"
+        self.client.force_login(self.user)
+
+    def post(self, *lines):
+        return self.client.post(
+            "/orders/",
+            {
+                "items": [{"item": item.pk, "quantity": n} for item, n in lines],
+                "notes": "",
+            },
+            content_type="application/json",
+        )
+
+    def test_places_order(self):
+        response = self.post((self.pen, 2), (self.pad, 1))
+
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get(pk=response.json()["id"])
+        self.assertEqual(order.creator, self.user)
+        self.assertEqual(order.status, "pending")
+        self.assertEqual(order.items_count, 2)
+        self.assertEqual(order.total_price, 7)
+        self.assertEqual(
+            sorted(order.items.values_list("item__name", "price_at_time")),
+            [("Pad", 3), ("Pen", 2)],
+        )
+        self.assertStock(self.pen, 10, 2)
+        self.assertStock(self.pad, 5, 1)
+
+    def test_rejects_order_beyond_stock(self):
+        response = self.post((self.pen, 2), (self.pad, 6))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(),
+            {"items": {str(self.pad.pk): "Exceeds the stock available by 1."}},
+        )
+        self.assertFalse(Order.objects.exists())
+        self.assertStock(self.pen, 10, 0)
+        self.assertStock(self.pad, 5, 0)
+
+    def test_query_count_does_not_grow_with_cart(self):
+        with CaptureQueriesContext(connection) as one_line:
+            self.post((self.pen, 1))
+        with CaptureQueriesContext(connection) as three_lines:
+            self.post((self.pen, 1), (self.pad, 1), (self.ruler, 1))
+
+        self.assertEqual(len(three_lines), len(one_line))
+
+    def test_requires_login(self):
+        self.client.logout()
+
+        self.assertIn(self.post((self.pen, 1)).status_code, (401, 403))
+        self.assertFalse(Order.objects.exists())
@@ -1,8 +1,11 @@
 from django.urls import include, path
-from rest_framework.routers import DefaultRouter
+from rest_framework.routers import SimpleRouter
 
+from .views import OrderViewSet
 
-router = DefaultRouter()
+# A DefaultRouter would put its API root view on "", in front of the orders.
+router = SimpleRouter()
+router.register(r"", OrderViewSet, basename="order")
 
 urlpatterns = [
     path("", include(router.urls)),
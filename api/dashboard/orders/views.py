@@ -1,3 +1,40 @@
-from django.shortcuts import render
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import mixins, status, viewsets
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
-# Create your views here.
+from .filters import OrderFilter
+from .models import Order
+from .serializers import OrderCreateSerializer, OrderSerializer
+
+
+class OrderViewSet(
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
+    """Orders placed by the current user; ``POST`` places a new one."""
+
+    serializer_class = OrderSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = OrderFilter
+
+    def get_queryset(self):
+        return Order.objects.filter(creator=self.request.user).prefetch_related("items")
+
+    def get_serializer_class(self):
+        if self.action == "create":
+            return OrderCreateSerializer
+        return OrderSerializer
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        order = serializer.save(creator=request.user)
+        data = OrderSerializer(
+            self.get_queryset().get(pk=order.pk),
+            context=self.get_serializer_context(),
+        ).data
+        return Response(data, status=status.HTTP_201_CREATED)
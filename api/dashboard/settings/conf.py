@@ -18,6 +18,20 @@ INSTALLED_APPS += [  # noqa: F405
 
 FRONTEND_WEB_URL = "https://www.bigpen.co.ke"
 
+# Seconds that a pending order holds its stock after its last change, before
+# `manage.py sweep_reservations` cancels it and releases the stock; 0 holds it
+# until the order is cancelled.
+ORDER_RESERVATION_TTL = config(  # noqa: F405
+    "ORDER_RESERVATION_TTL", default=1800, cast=int
+)
+
+# Seconds after which a worker rebuilds its typeahead index even if no change
+# was signalled through the cache, which is per process with local memory
+# caching; 0 only rebuilds on signalled changes.
+SUGGEST_INDEX_MAX_AGE = config(  # noqa: F405
+    "SUGGEST_INDEX_MAX_AGE", default=60, cast=int
+)
+
 # AUTH_USERNAME = {
 #     "label": "Username",
 #     "placeholder": "Enter your username",
@@ -1,9 +1,23 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
 from django.utils.html import format_html
 
 from home.globals.adminsite import admin_site
+from home.globals.images import THUMBNAIL
 
-from .models import StockCategory, StockItem, StockItemImage
+from .models import StockCategory, StockItem, StockItemImage, StockMovement
+
+
+class StockItemActionForm(helpers.ActionForm):
+    """Action form with the amount used by the bulk stock actions."""
+
+    amount = forms.DecimalField(
+        required=False,
+        min_value=0,
+        decimal_places=2,
+        help_text="Quantity to restock, or discount percentage.",
+    )
 
 
 @admin.register(StockCategory, site=admin_site)
@@ -33,6 +47,7 @@ class StockCategoryAdmin(admin.ModelAdmin):
             {"fields": ("created_at", "updated_at"), "classes": ("collapse",)},
         ),
     )
+    actions = ["activate_items", "deactivate_items"]
 
     def item_count(self, obj):
         """Display the number of items in this category."""
@@ -47,6 +62,21 @@ class StockCategoryAdmin(admin.ModelAdmin):
 
     item_count.short_description = "Items"
 
+    @admin.action(
+        description="Activate the items of selected categories", permissions=["change"]
+    )
+    def activate_items(self, request, queryset):
+        updated = StockItem.objects.filter(category__in=queryset).set_active(True)
+        messages.success(request, f"Activated {updated} item(s).")
+
+    @admin.action(
+        description="Deactivate the items of selected categories",
+        permissions=["change"],
+    )
+    def deactivate_items(self, request, queryset):
+        updated = StockItem.objects.filter(category__in=queryset).set_active(False)
+        messages.success(request, f"Deactivated {updated} item(s).")
+
 
 class StockStatusFilter(admin.SimpleListFilter):
     """Custom filter for stock status."""
@@ -62,16 +92,12 @@ class StockStatusFilter(admin.SimpleListFilter):
         )
 
     def queryset(self, request, queryset):
-        from django.db import models
-
         if self.value() == "in_stock":
-            return queryset.filter(quantity__gt=models.F("low_stock_threshold"))
+            return queryset.healthy_stock()
         elif self.value() == "low_stock":
-            return queryset.filter(
-                quantity__gt=0, quantity__lte=models.F("low_stock_threshold")
-            )
+            return queryset.low_stock()
         elif self.value() == "out_of_stock":
-            return queryset.filter(quantity=0)
+            return queryset.out_of_stock()
         return queryset
 
 
@@ -87,7 +113,7 @@ class StockItemImageInline(admin.TabularInline):
         """Display a small preview of the image in the inline."""
         return format_html(
             '<img src="{}" style="width: 60px; height: 60px; object-fit: cover; border-radius: 4px; border: 1px solid #ccc;" />',
-            obj.image_url,  # Assuming your StockItemImage model has an image_url property
+            obj.get_derivative_url(THUMBNAIL),
         )
 
     image_preview.short_description = "Preview"
@@ -158,6 +184,7 @@ class StockItemAdmin(admin.ModelAdmin):
                     "reserved_quantity",
                     "available_quantity_display",
                     "low_stock_threshold",
+                    "stripe_count",
                 )
             },
         ),
@@ -172,6 +199,63 @@ class StockItemAdmin(admin.ModelAdmin):
         ),
     )
     inlines = [StockItemImageInline]
+    action_form = StockItemActionForm
+    actions = [
+        "restock_items",
+        "discount_items",
+        "activate_items",
+        "deactivate_items",
+    ]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_stock_fields()
+
+    def get_action_amount(self, request):
+        """Return the amount entered next to the action, or None if invalid."""
+        form = self.action_form(request.POST)
+        form.fields["action"].choices = self.get_action_choices(request)
+        if not form.is_valid() or form.cleaned_data["amount"] is None:
+            messages.error(request, "Enter a valid amount for this action.")
+            return None
+        return form.cleaned_data["amount"]
+
+    @admin.action(
+        description="Restock selected items by the amount", permissions=["change"]
+    )
+    def restock_items(self, request, queryset):
+        amount = self.get_action_amount(request)
+        if amount is None:
+            return
+        if amount != amount.to_integral_value() or not amount:
+            messages.error(request, "The amount to restock must be a whole number.")
+            return
+        updated = queryset.restock(int(amount))
+        messages.success(request, f"Added {int(amount)} to {updated} item(s).")
+
+    @admin.action(
+        description="Set discount of selected items to the amount (%% of price)",
+        permissions=["change"],
+    )
+    def discount_items(self, request, queryset):
+        amount = self.get_action_amount(request)
+        if amount is None:
+            return
+        try:
+            updated = queryset.set_discount_percentage(amount)
+        except ValueError as e:
+            messages.error(request, str(e))
+            return
+        messages.success(request, f"Set a {amount}% discount on {updated} item(s).")
+
+    @admin.action(description="Activate selected items", permissions=["change"])
+    def activate_items(self, request, queryset):
+        updated = queryset.set_active(True)
+        messages.success(request, f"Activated {updated} item(s).")
+
+    @admin.action(description="Deactivate selected items", permissions=["change"])
+    def deactivate_items(self, request, queryset):
+        updated = queryset.set_active(False)
+        messages.success(request, f"Deactivated {updated} item(s).")
 
     def image_preview(self, obj):
         """Display a small preview of the main item image for list view."""
@@ -180,7 +264,7 @@ class StockItemAdmin(admin.ModelAdmin):
 
         return format_html(
             '<img src="{}" style="width: 50px; height: 50px; object-fit: cover; border-radius: 4px;" />',
-            obj.image_url,
+            obj.get_derivative_url(THUMBNAIL),
         )
 
     image_preview.short_description = "Image"
@@ -192,7 +276,7 @@ class StockItemAdmin(admin.ModelAdmin):
 
         return format_html(
             '<img src="{}" style="width: 150px; height: 150px; object-fit: cover; border-radius: 8px; border: 1px solid #ddd; box-shadow: 0 2px 4px rgba(0,0,0,0.1);" />',
-            obj.image_url,
+            obj.get_derivative_url(THUMBNAIL),
         )
 
     image_preview_detail.short_description = "Image Preview"
@@ -210,6 +294,7 @@ class StockItemAdmin(admin.ModelAdmin):
         return format_html(price_html)
 
     current_price_display.short_description = "Current Price"
+    current_price_display.admin_order_field = "current_price"
 
     def stock_status(self, obj):
         """Display stock status with visual indicators."""
@@ -229,6 +314,7 @@ class StockItemAdmin(admin.ModelAdmin):
             )
 
     stock_status.short_description = "Stock Status"
+    stock_status.admin_order_field = "available_quantity"
 
     def calculated_current_price(self, obj):
         """Display calculated current price in admin form."""
@@ -252,7 +338,7 @@ class StockItemAdmin(admin.ModelAdmin):
             return "-"
 
         available = obj.available_quantity
-        reserved = obj.reserved_quantity
+        reserved = obj.reserved_quantity - obj.stripe_headroom
         total = obj.quantity
 
         status = f"{available} available"
@@ -263,3 +349,33 @@ class StockItemAdmin(admin.ModelAdmin):
         return status
 
     available_quantity_display.short_description = "Available Stock"
+
+
+@admin.register(StockMovement, site=admin_site)
+class StockMovementAdmin(admin.ModelAdmin):
+    """
+    Read-only view of the stock movement ledger. Movements are written by the
+    stock operations themselves and are never edited or deleted.
+    """
+
+    list_display = (
+        "created_at",
+        "item",
+        "kind",
+        "quantity_delta",
+        "reserved_delta",
+        "reference",
+    )
+    list_filter = ("kind", "created_at")
+    list_select_related = ("item",)
+    search_fields = ("item__name", "reference")
+    date_hierarchy = "created_at"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
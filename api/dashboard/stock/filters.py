@@ -0,0 +1,33 @@
+import django_filters
+
+from .models import StockItem
+
+
+class StockItemFilter(django_filters.FilterSet):
+    """
+    Filters for the stock item API. Computed fields filter on the annotations
+    added by ``StockItem.objects.with_stock_fields()``.
+    """
+
+    in_stock = django_filters.BooleanFilter(method="filter_in_stock")
+    low_stock = django_filters.BooleanFilter(method="filter_low_stock")
+    min_price = django_filters.NumberFilter(
+        field_name="current_price", lookup_expr="gte"
+    )
+    max_price = django_filters.NumberFilter(
+        field_name="current_price", lookup_expr="lte"
+    )
+
+    class Meta:
+        model = StockItem
+        fields = ["is_active", "is_featured", "category"]
+
+    def filter_in_stock(self, queryset, name, value):
+        if value:
+            return queryset.in_stock()
+        return queryset.out_of_stock()
+
+    def filter_low_stock(self, queryset, name, value):
+        if value:
+            return queryset.low_stock()
+        return queryset.healthy_stock()
@@ -0,0 +1,71 @@
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...models import StockItem
+
+
+def parse_ids(value):
+    try:
+        return [int(pk) for pk in value.split(",") if pk.strip()]
+    except ValueError:
+        raise CommandError(f"Invalid id list: {value}")
+
+
+def parse_percentage(value):
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise CommandError(f"Invalid percentage: {value}")
+
+
+class Command(BaseCommand):
+    help = "Restock, discount, activate or deactivate stock items in bulk, one UPDATE per run"
+
+    def add_arguments(self, parser):
+        selection = parser.add_mutually_exclusive_group(required=True)
+        selection.add_argument(
+            "--items", type=parse_ids, help="Comma-separated item ids"
+        )
+        selection.add_argument(
+            "--categories",
+            type=parse_ids,
+            help="Comma-separated category ids, for all of their items",
+        )
+        selection.add_argument("--all", action="store_true", help="Every item")
+
+        operation = parser.add_mutually_exclusive_group(required=True)
+        operation.add_argument(
+            "--restock", type=int, metavar="N", help="Add N to the quantity"
+        )
+        operation.add_argument(
+            "--discount",
+            type=parse_percentage,
+            metavar="PERCENT",
+            help="Set the discount to PERCENT of the original price",
+        )
+        operation.add_argument("--activate", action="store_true")
+        operation.add_argument("--deactivate", action="store_true")
+
+    def handle(self, *args, **options):
+        items = StockItem.objects.all()
+        if options["items"] is not None:
+            items = items.filter(pk__in=options["items"])
+        elif options["categories"] is not None:
+            items = items.filter(category__in=options["categories"])
+
+        try:
+            if options["restock"] is not None:
+                updated = items.restock(options["restock"])
+                message = f"Added {options['restock']} to {updated} item(s)."
+            elif options["discount"] is not None:
+                updated = items.set_discount_percentage(options["discount"])
+                message = f"Set a {options['discount']}% discount on {updated} item(s)."
+            else:
+                updated = items.set_active(options["activate"])
+                verb = "Activated" if options["activate"] else "Deactivated"
+                message = f"{verb} {updated} item(s)."
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...models import StockReservationStripe
+
+
+class Command(BaseCommand):
+    help = "Fold stripe reservations back into their items and hand out new allotments"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Keep running, compacting every INTERVAL seconds",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            compacted = StockReservationStripe.objects.compact()
+            if compacted or options["verbosity"] > 1:
+                self.stdout.write(
+                    self.style.SUCCESS(f"Compacted the stripes of {compacted} item(s).")
+                )
+            if not options["interval"]:
+                return
+            try:
+                time.sleep(options["interval"])
+            except KeyboardInterrupt:
+                return
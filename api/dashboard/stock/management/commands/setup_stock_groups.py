@@ -1,6 +1,6 @@
 from home.accounts.management.commands.setup_groups import AbstractGroupSetupCommand
 
-from ...models import StockCategory, StockItem
+from ...models import StockCategory, StockItem, StockMovement
 
 
 class Command(AbstractGroupSetupCommand):
@@ -10,10 +10,12 @@ class Command(AbstractGroupSetupCommand):
     STOCK_OPERATOR:
     - Stock Categories: View only (cannot create or modify categories)
     - Stock Items: Full CRUD (can add, edit, delete, and view items)
+    - Stock Movements: View only (the ledger is append-only)
 
     STOCK_MANAGER:
     - Stock Categories: Full CRUD (can manage all categories)
     - Stock Items: Full CRUD (can manage all items)
+    - Stock Movements: View only (the ledger is append-only)
 
     The command is idempotent - it can be run multiple times safely.
     """
@@ -30,6 +32,7 @@ class Command(AbstractGroupSetupCommand):
                     StockItem,
                     ["add", "change", "delete", "view"],
                 ),  # Full access to items
+                (StockMovement, ["view"]),  # View-only access to the ledger
             ],
             "description": (
                 "Operators can fully manage stock items (create, edit, delete), "
@@ -48,6 +51,7 @@ class Command(AbstractGroupSetupCommand):
                     StockItem,
                     ["add", "change", "delete", "view"],
                 ),  # Full item management
+                (StockMovement, ["view"]),  # View-only access to the ledger
             ],
             "description": (
                 "Full management permissions for all stock categories and items."
@@ -60,5 +64,6 @@ class Command(AbstractGroupSetupCommand):
         name_mappings = {
             "stockcategory": "Stock Category",
             "stockitem": "Stock Item",
+            "stockmovement": "Stock Movement",
         }
         return name_mappings.get(model_name.lower(), model_name.title())
@@ -0,0 +1,102 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from ...models import (
+    StockItem,
+    StockMovement,
+    StockReservationStripe,
+    StockSnapshot,
+)
+
+
+class Command(BaseCommand):
+    help = "Snapshot the stock of every item and report drift from the movement ledger"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            # Every change to the stock locks the item or stripe rows before
+            # recording its movements, so once the rows are locked, the
+            # movements recorded so far are exactly those in the stock.
+            list(
+                StockItem.objects.select_for_update()
+                .order_by("pk")
+                .values_list("pk", flat=True)
+            )
+            list(
+                StockReservationStripe.objects.select_for_update()
+                .order_by("item", "stripe")
+                .values_list("pk", flat=True)
+            )
+            last_movement = StockMovement.objects.aggregate(last=Max("pk"))["last"]
+            taken_at = timezone.now()
+            rows = self.get_rows()
+            StockSnapshot.objects.bulk_create(
+                StockSnapshot(
+                    item_id=pk,
+                    taken_at=taken_at,
+                    quantity=quantity,
+                    reserved_quantity=reserved,
+                    last_movement=last_movement or 0,
+                )
+                for pk, quantity, reserved, _, _ in rows
+            )
+
+        drifted = 0
+        for pk, quantity, reserved, ledger_quantity, ledger_reserved in rows:
+            if (quantity, reserved) != (ledger_quantity, ledger_reserved):
+                drifted += 1
+                self.stderr.write(
+                    f"Item {pk}: stock is {quantity} ({reserved} reserved), "
+                    f"the ledger says {ledger_quantity} ({ledger_reserved} reserved)"
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Took snapshots of {len(rows)} items, {drifted} drifted from the ledger."
+            )
+        )
+
+    def get_rows(self):
+        """
+        Return ``(id, quantity, reserved, ledger quantity, ledger reserved)``
+        for every item in one query, the ledger values being the latest
+        snapshot plus the movements since.
+        """
+        latest = StockSnapshot.objects.filter(item=OuterRef("pk")).order_by("-taken_at")
+        moved = (
+            StockMovement.objects.filter(
+                item=OuterRef("pk"),
+                pk__gt=Coalesce(OuterRef("last_movement"), Value(0)),
+            )
+            .order_by()
+            .values("item")
+        )
+
+        def total(queryset, field):
+            return Coalesce(
+                Subquery(queryset.values(field)[:1]),
+                0,
+            )
+
+        return list(
+            StockItem.objects.with_stock_fields()
+            .order_by("pk")
+            .annotate(last_movement=Subquery(latest.values("last_movement")[:1]))
+            .annotate(
+                ledger_quantity=total(latest, "quantity")
+                + total(moved.annotate(moved=Sum("quantity_delta")), "moved"),
+                ledger_reserved=total(latest, "reserved_quantity")
+                + total(moved.annotate(moved=Sum("reserved_delta")), "moved"),
+            )
+            .values_list(
+                "pk",
+                "quantity",
+                # Stock allotted to reservation stripes isn't reserved yet.
+                F("reserved_quantity") - F("stripe_headroom"),
+                "ledger_quantity",
+                "ledger_reserved",
+            )
+        )
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.3 on 2026-10-17 03:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stockcategory',
+            index=models.Index(fields=['display_order', 'name', 'id'], name='stock_category_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockitem',
+            index=models.Index(fields=['display_order', 'name', 'id'], name='stock_item_order_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 03:35
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0002_stock_order_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stockitem',
+            index=models.Index(django.db.models.expressions.CombinedExpression(models.F('original_price'), '-', models.F('discount')), models.F('id'), name='stock_item_price_idx'),
+        ),
+    ]
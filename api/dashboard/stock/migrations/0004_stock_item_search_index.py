@@ -0,0 +1,23 @@
+from django.db import migrations
+
+from dashboard.stock import search
+
+
+def install_search_index(apps, schema_editor):
+    search.install(schema_editor.connection)
+    search.rebuild(schema_editor.connection)
+
+
+def uninstall_search_index(apps, schema_editor):
+    search.uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0003_stock_item_price_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 5.2.3 on 2026-10-17 03:46
+
+from django.core.files.images import get_image_dimensions
+from django.db import migrations, models
+
+from dashboard.stock import search
+from home.globals import images
+
+
+def drop_search_triggers(apps, schema_editor):
+    search.drop_triggers(schema_editor.connection)
+
+
+def restore_search_triggers(apps, schema_editor):
+    if search.is_installed(schema_editor.connection):
+        search.install(schema_editor.connection)
+
+
+def fill_image_metadata(apps, schema_editor):
+    for model_name in ('StockItem', 'StockItemImage'):
+        model = apps.get_model('stock', model_name)
+        for obj in model.objects.exclude(image='').exclude(image__isnull=True):
+            try:
+                width, height = get_image_dimensions(obj.image)
+            except OSError:
+                continue  # The file is missing from storage.
+            placeholder, color = images.placeholder(obj.image)
+            obj.image.close()
+            model.objects.filter(pk=obj.pk).update(
+                image_width=width,
+                image_height=height,
+                image_placeholder=placeholder,
+                image_color=color,
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0004_stock_item_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_search_triggers, restore_search_triggers),
+        migrations.AddField(
+            model_name='stockitem',
+            name='image_color',
+            field=models.CharField(blank=True, editable=False, help_text='Dominant colour of the image as a hex code.', max_length=7),
+        ),
+        migrations.AddField(
+            model_name='stockitem',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Image height in pixels.', null=True),
+        ),
+        migrations.AddField(
+            model_name='stockitem',
+            name='image_placeholder',
+            field=models.TextField(blank=True, editable=False, help_text='Tiny blurred preview of the image as a data URI.'),
+        ),
+        migrations.AddField(
+            model_name='stockitem',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Image width in pixels.', null=True),
+        ),
+        migrations.AddField(
+            model_name='stockitemimage',
+            name='image_color',
+            field=models.CharField(blank=True, editable=False, help_text='Dominant colour of the image as a hex code.', max_length=7),
+        ),
+        migrations.AddField(
+            model_name='stockitemimage',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Image height in pixels.', null=True),
+        ),
+        migrations.AddField(
+            model_name='stockitemimage',
+            name='image_placeholder',
+            field=models.TextField(blank=True, editable=False, help_text='Tiny blurred preview of the image as a data URI.'),
+        ),
+        migrations.AddField(
+            model_name='stockitemimage',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Image width in pixels.', null=True),
+        ),
+        migrations.AlterField(
+            model_name='stockitem',
+            name='image',
+            field=models.ImageField(blank=True, height_field='image_height', help_text='Optional Image.', null=True, upload_to='images/', width_field='image_width'),
+        ),
+        migrations.AlterField(
+            model_name='stockitemimage',
+            name='image',
+            field=models.ImageField(blank=True, height_field='image_height', help_text='Optional Image.', null=True, upload_to='images/', width_field='image_width'),
+        ),
+        migrations.RunPython(fill_image_metadata, migrations.RunPython.noop),
+        migrations.RunPython(restore_search_triggers, drop_search_triggers),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.3 on 2026-10-17 03:49
+
+import home.globals.storage
+from django.db import migrations, models
+
+from dashboard.stock import search
+
+
+def drop_search_triggers(apps, schema_editor):
+    search.drop_triggers(schema_editor.connection)
+
+
+def restore_search_triggers(apps, schema_editor):
+    if search.is_installed(schema_editor.connection):
+        search.install(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0005_image_dimensions_and_placeholders'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_search_triggers, restore_search_triggers),
+        migrations.AlterField(
+            model_name='stockitem',
+            name='image',
+            field=models.ImageField(blank=True, height_field='image_height', help_text='Optional Image.', null=True, storage=home.globals.storage.get_image_storage, upload_to='images/', width_field='image_width'),
+        ),
+        migrations.AlterField(
+            model_name='stockitemimage',
+            name='image',
+            field=models.ImageField(blank=True, height_field='image_height', help_text='Optional Image.', null=True, storage=home.globals.storage.get_image_storage, upload_to='images/', width_field='image_width'),
+        ),
+        migrations.RunPython(restore_search_triggers, drop_search_triggers),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.3 on 2026-10-17 03:58
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def take_opening_snapshots(apps, schema_editor):
+    # The ledger starts from the stock as it stands now.
+    StockItem = apps.get_model('stock', 'StockItem')
+    StockSnapshot = apps.get_model('stock', 'StockSnapshot')
+    taken_at = django.utils.timezone.now()
+    StockSnapshot.objects.bulk_create(
+        StockSnapshot(
+            item_id=pk,
+            taken_at=taken_at,
+            quantity=quantity,
+            reserved_quantity=reserved_quantity,
+        )
+        for pk, quantity, reserved_quantity in StockItem.objects.values_list(
+            'pk', 'quantity', 'reserved_quantity'
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0006_image_content_addressed_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('receipt', 'Receipt'), ('reservation', 'Reservation'), ('release', 'Release'), ('consumption', 'Consumption'), ('adjustment', 'Adjustment')], help_text='What moved the stock.', max_length=20)),
+                ('quantity_delta', models.IntegerField(default=0, help_text='Change to the quantity in stock.')),
+                ('reserved_delta', models.IntegerField(default=0, help_text='Change to the reserved quantity.')),
+                ('reference', models.CharField(blank=True, help_text='Optional. What caused the movement, e.g. an order id.', max_length=64)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Date and time of the movement.')),
+                ('item', models.ForeignKey(help_text='Item whose stock moved.', on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='stock.stockitem')),
+            ],
+            options={
+                'ordering': ['created_at', 'id'],
+                'indexes': [models.Index(fields=['item', 'created_at'], name='stock_movement_item_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taken_at', models.DateTimeField(help_text='Date and time of the snapshot.')),
+                ('quantity', models.IntegerField(help_text='Quantity in stock.')),
+                ('reserved_quantity', models.IntegerField(help_text='Reserved quantity.')),
+                ('item', models.ForeignKey(help_text='Item the snapshot is of.', on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='stock.stockitem')),
+            ],
+            options={
+                'ordering': ['taken_at', 'id'],
+                'constraints': [models.UniqueConstraint(fields=('item', 'taken_at'), name='stock_snapshot_item_unique')],
+            },
+        ),
+        migrations.RunPython(take_opening_snapshots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from dashboard.stock import search
+
+
+def drop_search_triggers(apps, schema_editor):
+    search.drop_triggers(schema_editor.connection)
+
+
+def restore_search_triggers(apps, schema_editor):
+    if search.is_installed(schema_editor.connection):
+        search.install(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0007_stock_movement_ledger'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_search_triggers, restore_search_triggers),
+        migrations.AddField(
+            model_name='stockitem',
+            name='stripe_count',
+            field=models.PositiveSmallIntegerField(default=0, help_text="Optional. Spread reservations over this many counters so that checkouts don't queue on this item, e.g. during a flash sale. Takes effect at the next stripe compaction; 0 turns it off."),
+        ),
+        migrations.CreateModel(
+            name='StockReservationStripe',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stripe', models.PositiveSmallIntegerField(help_text='Number of the stripe.')),
+                ('allotment', models.PositiveIntegerField(default=0, help_text='Stock handed to the stripe to reserve from.')),
+                ('reserved_quantity', models.PositiveIntegerField(default=0, help_text='Quantity reserved through the stripe.')),
+                ('item', models.ForeignKey(help_text='Item the stripe takes reservations for.', on_delete=django.db.models.deletion.CASCADE, related_name='stripes', to='stock.stockitem')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('item', 'stripe'), name='stock_stripe_item_unique')],
+            },
+        ),
+        migrations.RunPython(restore_search_triggers, drop_search_triggers),
+    ]
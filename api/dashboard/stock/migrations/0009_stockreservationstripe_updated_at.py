@@ -0,0 +1,20 @@
+# Generated by Django 5.2.3 on 2026-10-17 05:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0008_stock_reservation_stripes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockreservationstripe',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, help_text='Date and time last updated.'),
+            preserve_default=False,
+        ),
+    ]
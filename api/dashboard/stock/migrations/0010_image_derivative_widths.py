@@ -0,0 +1,54 @@
+# Generated by Django 5.2.3 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+from dashboard.stock import search
+from home.globals import images
+
+
+def drop_search_triggers(apps, schema_editor):
+    search.drop_triggers(schema_editor.connection)
+
+
+def restore_search_triggers(apps, schema_editor):
+    if search.is_installed(schema_editor.connection):
+        search.install(schema_editor.connection)
+
+
+def record_image_derivatives(apps, schema_editor):
+    for model_name in ('StockItem', 'StockItemImage'):
+        model = apps.get_model('stock', model_name)
+        names = set(
+            model.objects.exclude(image='').exclude(image__isnull=True).values_list('image', flat=True)
+        )
+        for name in names:
+            try:
+                if not images.has_derivatives(name):
+                    continue
+                widths = images.stored_widths(name)
+            except OSError:
+                continue  # Left for the image_derivatives command.
+            model.objects.filter(image=name).update(image_derivatives=widths)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0009_stockreservationstripe_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_search_triggers, restore_search_triggers),
+        migrations.AddField(
+            model_name='stockitem',
+            name='image_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Width in pixels of each generated rendition, by label.'),
+        ),
+        migrations.AddField(
+            model_name='stockitemimage',
+            name='image_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Width in pixels of each generated rendition, by label.'),
+        ),
+        migrations.RunPython(record_image_derivatives, migrations.RunPython.noop),
+        migrations.RunPython(restore_search_triggers, drop_search_triggers),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.3 on 2026-10-17 11:40
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def record_last_movements(apps, schema_editor):
+    # Existing snapshots were bounded by time; take the last movement
+    # recorded by then as the one they include.
+    StockMovement = apps.get_model('stock', 'StockMovement')
+    StockSnapshot = apps.get_model('stock', 'StockSnapshot')
+    StockSnapshot.objects.update(
+        last_movement=Coalesce(
+            Subquery(
+                StockMovement.objects.filter(created_at__lte=OuterRef('taken_at'))
+                .order_by('-pk')
+                .values('pk')[:1]
+            ),
+            Value(0),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0010_image_derivative_widths'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stocksnapshot',
+            name='last_movement',
+            field=models.BigIntegerField(default=0, help_text='Id of the last stock movement the snapshot includes.'),
+        ),
+        migrations.RunPython(record_last_movements, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,25 @@
+import random
+from decimal import Decimal
+from functools import partial
+
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.db.models import (
+    Case,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast, Coalesce, Greatest, Now, Round
+from django.utils import timezone
+from django.utils.functional import cached_property
 
+from home.globals.cache import bump_model_version, bump_version
 from home.globals.models import (
     AbstractBootstrapIcon,
     AbstractCreatedAtUpdatedAt,
@@ -9,6 +28,398 @@ from home.globals.models import (
 )
 
 
+class annotated_property:
+    """
+    Read-only property that steps aside for a queryset annotation of the same
+    name.
+
+    Unlike ``property`` this is a non-data descriptor, so when Django sets an
+    annotated value on the instance it lands in ``__dict__`` and is returned
+    as-is; instances loaded without the annotation fall back to the getter.
+    """
+
+    def __init__(self, fget):
+        self.fget = fget
+        self.__doc__ = fget.__doc__
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return self.fget(instance)
+
+
+class InsufficientStockError(Exception):
+    """
+    Raised when stock can't cover a request. ``shortages`` maps item ids to
+    the quantity that was missing.
+    """
+
+    def __init__(self, shortages):
+        self.shortages = shortages
+        super().__init__(
+            "Insufficient stock for item(s) "
+            + ", ".join(str(pk) for pk in sorted(shortages))
+        )
+
+
+def _quantity_case(quantities, field="pk"):
+    """``CASE id WHEN ... THEN quantity ... ELSE 0`` for an UPDATE."""
+    return Case(
+        *[
+            When(**{field: pk}, then=Value(quantity))
+            for pk, quantity in quantities.items()
+        ],
+        default=Value(0),
+        output_field=models.IntegerField(),
+    )
+
+
+def _stripe_headroom():
+    """
+    Stock allotted to an item's reservation stripes and not yet reserved
+    through them, which the item's own ``reserved_quantity`` counts as held.
+    """
+    headroom = (
+        StockReservationStripe.objects.filter(item=OuterRef("pk"))
+        .order_by()
+        .values("item")
+        .annotate(total=Sum(F("allotment") - F("reserved_quantity")))
+        .values("total")
+    )
+    return Coalesce(Subquery(headroom), Value(0), output_field=models.IntegerField())
+
+
+def _stock_updated(using):
+    """
+    ``QuerySet.update()`` skips the signals that bump the cache version, so
+    bump it once the write is committed.
+    """
+    transaction.on_commit(partial(bump_model_version, StockItem), using=using)
+
+
+# Named cache version of what the item and category names show: bumped only
+# when a name or its visibility changes, not on every stock movement.
+NAMES_VERSION = "stock-names"
+
+
+def _names_updated(using):
+    transaction.on_commit(partial(bump_version, NAMES_VERSION), using=using)
+
+
+class StockItemQuerySet(models.QuerySet):
+    """QuerySet that computes the derived stock fields in SQL."""
+
+    STOCK_FIELDS = (
+        "stripe_headroom",
+        "available_quantity",
+        "is_in_stock",
+        "is_low_stock",
+        "current_price",
+        "discount_percentage",
+    )
+
+    def with_stock_fields(self):
+        """
+        Annotate the values behind the ``StockItem`` properties of the same
+        name, so they can be filtered and ordered on in the database.
+        """
+        return self.annotate(stripe_headroom=_stripe_headroom()).annotate(
+            available_quantity=Greatest(
+                F("quantity") - F("reserved_quantity") + F("stripe_headroom"),
+                Value(0),
+                output_field=models.IntegerField(),
+            ),
+            is_in_stock=ExpressionWrapper(
+                Q(quantity__gt=F("reserved_quantity") - F("stripe_headroom")),
+                output_field=models.BooleanField(),
+            ),
+            # max(0, available) <= threshold, without the max().
+            is_low_stock=ExpressionWrapper(
+                Q(
+                    quantity__lte=F("reserved_quantity")
+                    - F("stripe_headroom")
+                    + F("low_stock_threshold")
+                ),
+                output_field=models.BooleanField(),
+            ),
+            current_price=ExpressionWrapper(
+                F("original_price") - F("discount"),
+                output_field=models.DecimalField(max_digits=10, decimal_places=2),
+            ),
+            discount_percentage=Case(
+                When(original_price=0, then=Value(0)),
+                # Divide as floats: SQLite would otherwise truncate whole-number
+                # decimals with integer division. Rounded in SQL so that the
+                # values filtered on match the ones loaded, e.g. for keyset
+                # pagination.
+                default=Round(
+                    ExpressionWrapper(
+                        -F("discount")
+                        * 100
+                        / Cast("original_price", models.FloatField()),
+                        output_field=models.FloatField(),
+                    ),
+                    2,
+                ),
+                output_field=models.DecimalField(max_digits=5, decimal_places=2),
+            ),
+        )
+
+    def in_stock(self):
+        return self.filter(quantity__gt=F("reserved_quantity") - _stripe_headroom())
+
+    def out_of_stock(self):
+        return self.filter(quantity__lte=F("reserved_quantity") - _stripe_headroom())
+
+    def low_stock(self):
+        """Items that are in stock but at or below their threshold."""
+        return self.in_stock().filter(
+            quantity__lte=F("reserved_quantity")
+            - _stripe_headroom()
+            + F("low_stock_threshold")
+        )
+
+    def healthy_stock(self):
+        """Items whose available quantity is above their threshold."""
+        return self.filter(
+            quantity__gt=F("reserved_quantity")
+            - _stripe_headroom()
+            + F("low_stock_threshold")
+        )
+
+    @staticmethod
+    def _shortages(quantities, locked, available=True):
+        """
+        Return ``{id: missing}`` for the items whose available quantity (or
+        whole quantity, if not ``available``) doesn't cover ``quantities``,
+        from the stock ``_lock()`` read before the update.
+        """
+        on_hand = {
+            pk: quantity - reserved if available else quantity
+            for pk, (quantity, reserved) in locked.items()
+        }
+        shortages = {}
+        for pk, quantity in quantities.items():
+            missing = quantity - max(0, on_hand.get(pk, 0))
+            if missing > 0:
+                shortages[pk] = missing
+        return shortages
+
+    def _lock(self, pks):
+        """
+        Lock the rows of ``pks`` in primary key order, so concurrent carts
+        can't deadlock, and return their ``(quantity, reserved_quantity)`` by
+        id.
+        """
+        return {
+            pk: (quantity, reserved)
+            for pk, quantity, reserved in self.filter(pk__in=pks)
+            .select_for_update()
+            .order_by("pk")
+            .values_list("pk", "quantity", "reserved_quantity")
+        }
+
+    def reserve(self, quantities, reference=""):
+        """
+        Reserve ``{item_id: quantity}`` for a whole cart, all or nothing.
+
+        The rows are locked and then reserved with one UPDATE whose WHERE
+        clause also checks availability. Raises ``InsufficientStockError``
+        listing every item that falls short, leaving all of them untouched.
+
+        Items with reservation stripes are reserved on one of their stripes
+        instead, without touching - or locking - the item rows. If a stripe
+        can't cover its share, the stripes are settled back into the item
+        rows, those are reserved as usual and the stripes get new allotments
+        from what is left.
+        """
+        quantities = {pk: quantity for pk, quantity in quantities.items() if quantity}
+        if not quantities:
+            return
+
+        with transaction.atomic(using=self.db):
+            striped = dict(
+                self.filter(pk__in=quantities, stripe_count__gt=0).values_list(
+                    "pk", "stripe_count"
+                )
+            )
+            stripes = StockReservationStripe.objects.using(self.db)
+            missed = {}
+            if striped:
+                on_stripes = {pk: quantities[pk] for pk in striped}
+                if not stripes.reserve(on_stripes, striped):
+                    stripes.compact(on_stripes, reallot=False)
+                    missed, striped = striped, {}
+
+            on_rows = {
+                pk: quantity for pk, quantity in quantities.items() if pk not in striped
+            }
+            if on_rows:
+                locked = self._lock(on_rows)
+                condition = Q()
+                for pk, quantity in on_rows.items():
+                    condition |= Q(
+                        pk=pk, quantity__gte=F("reserved_quantity") + quantity
+                    )
+
+                updated = self.filter(condition).update(
+                    reserved_quantity=F("reserved_quantity") + _quantity_case(on_rows),
+                    updated_at=Now(),
+                )
+                if updated != len(on_rows):
+                    raise InsufficientStockError(self._shortages(on_rows, locked))
+            if missed:
+                stripes.compact(missed)
+            StockMovement.objects.using(self.db).record(
+                StockMovement.RESERVATION,
+                reserved=quantities,
+                reference=reference,
+            )
+            _stock_updated(self.db)
+
+    def release(self, quantities, reference=""):
+        """
+        Release ``{item_id: quantity}`` of reserved stock in one UPDATE, never
+        more than is reserved.
+        """
+        quantities = {pk: quantity for pk, quantity in quantities.items() if quantity}
+        if not quantities:
+            return
+
+        with transaction.atomic(using=self.db):
+            # Reservations taken on stripes are settled into the item rows
+            # first, and the stripes get fresh allotments afterwards.
+            stripes = StockReservationStripe.objects.using(self.db)
+            stripes.compact(quantities, reallot=False)
+            held = {
+                pk: reserved for pk, (_, reserved) in self._lock(quantities).items()
+            }
+            released = {
+                pk: min(quantity, held[pk])
+                for pk, quantity in quantities.items()
+                if held.get(pk)
+            }
+            if released:
+                self.filter(pk__in=released).update(
+                    reserved_quantity=Greatest(
+                        F("reserved_quantity") - _quantity_case(released), Value(0)
+                    ),
+                    updated_at=Now(),
+                )
+                StockMovement.objects.using(self.db).record(
+                    StockMovement.RELEASE,
+                    reserved={pk: -quantity for pk, quantity in released.items()},
+                    reference=reference,
+                )
+                _stock_updated(self.db)
+            stripes.compact(quantities)
+
+    def consume(self, quantities, reserved=None, reference=""):
+        """
+        Take ``{item_id: quantity}`` out of stock and out of the reservations,
+        all or nothing, in one UPDATE. Raises ``InsufficientStockError`` if an
+        item doesn't have the quantity on hand.
+
+        ``reserved`` gives the part of each quantity that was reserved, for
+        callers that track it; by default all of it is assumed to be.
+        """
+        quantities = {pk: quantity for pk, quantity in quantities.items() if quantity}
+        if not quantities:
+            return
+        if reserved is None:
+            reserved = quantities
+
+        with transaction.atomic(using=self.db):
+            stripes = StockReservationStripe.objects.using(self.db)
+            stripes.compact(quantities, reallot=False)
+            locked = self._lock(quantities)
+            reserved = {
+                pk: min(reserved.get(pk, 0), locked.get(pk, (0, 0))[1])
+                for pk in quantities
+            }
+            condition = Q()
+            for pk, quantity in quantities.items():
+                condition |= Q(pk=pk, quantity__gte=quantity)
+
+            updated = self.filter(condition).update(
+                quantity=F("quantity") - _quantity_case(quantities),
+                reserved_quantity=Greatest(
+                    F("reserved_quantity") - _quantity_case(reserved), Value(0)
+                ),
+                updated_at=Now(),
+            )
+            if updated != len(quantities):
+                raise InsufficientStockError(
+                    self._shortages(quantities, locked, available=False)
+                )
+            StockMovement.objects.using(self.db).record(
+                StockMovement.CONSUMPTION,
+                quantity={pk: -quantity for pk, quantity in quantities.items()},
+                reserved={pk: -quantity for pk, quantity in reserved.items()},
+                reference=reference,
+            )
+            stripes.compact(quantities)
+            _stock_updated(self.db)
+
+    def restock(self, amount, reference=""):
+        """
+        Add ``amount`` to the quantity of every item in one UPDATE, recording
+        the receipts in the ledger. Returns the number of items restocked.
+        """
+        if amount <= 0:
+            raise ValueError("The amount to restock must be positive.")
+
+        with transaction.atomic(using=self.db):
+            pks = list(self.values_list("pk", flat=True))
+            updated = self.model._default_manager.filter(pk__in=pks).update(
+                quantity=F("quantity") + amount, updated_at=Now()
+            )
+            StockMovement.objects.using(self.db).record(
+                StockMovement.RECEIPT,
+                quantity=dict.fromkeys(pks, amount),
+                reference=reference,
+            )
+            _stock_updated(self.db)
+        return updated
+
+    def set_discount_percentage(self, percent):
+        """
+        Set the discount of every item to ``percent`` of its original price
+        in one UPDATE. Returns the number of items updated.
+        """
+        percent = Decimal(percent)
+        if not 0 <= percent <= 100:
+            raise ValueError("The discount must be between 0 and 100 percent.")
+
+        # The guard checks the rounded value that gets written, which can
+        # reach the limit when the unrounded one stays just below it.
+        discount = Round(
+            ExpressionWrapper(
+                F("original_price") * Value(percent / 100),
+                output_field=models.DecimalField(max_digits=10, decimal_places=2),
+            ),
+            2,
+        )
+        field = StockItem._meta.get_field("discount")
+        limit = Decimal(10) ** (field.max_digits - field.decimal_places)
+        if self.alias(new_discount=discount).filter(new_discount__gte=limit).exists():
+            raise ValueError(
+                f"A {percent}% discount would reach {limit} on some of these "
+                "items, more than a discount can hold."
+            )
+
+        updated = self.update(discount=discount, updated_at=Now())
+        _stock_updated(self.db)
+        return updated
+
+    def set_active(self, is_active):
+        """Activate or deactivate every item in one UPDATE."""
+        updated = self.update(is_active=is_active, updated_at=Now())
+        _stock_updated(self.db)
+        _names_updated(self.db)
+        return updated
+
+
 class StockCategory(
     AbstractDisplayOrder,
     AbstractBootstrapIcon,
@@ -19,6 +430,13 @@ class StockCategory(
     class Meta:
         verbose_name_plural = "Stock Categories"
         ordering = ["display_order", "name"]
+        indexes = [
+            # Matches the keyset pagination ordering (ordering + primary key).
+            models.Index(
+                fields=["display_order", "name", "id"],
+                name="stock_category_order_idx",
+            ),
+        ]
 
     name = models.CharField(max_length=255, help_text="Name of the category.")
     description = models.TextField(
@@ -47,6 +465,19 @@ class StockItem(
 
     class Meta:
         ordering = ["display_order", "name"]
+        indexes = [
+            # Matches the keyset pagination ordering (ordering + primary key).
+            models.Index(
+                fields=["display_order", "name", "id"],
+                name="stock_item_order_idx",
+            ),
+            # Serves ?ordering=current_price (the current_price annotation).
+            models.Index(
+                F("original_price") - F("discount"),
+                F("id"),
+                name="stock_item_price_idx",
+            ),
+        ]
 
     category = models.ForeignKey(
         StockCategory,
@@ -73,6 +504,14 @@ class StockItem(
         default=5,
         help_text="Alert when stock falls below this number.",
     )
+    stripe_count = models.PositiveSmallIntegerField(
+        default=0,
+        help_text=(
+            "Optional. Spread reservations over this many counters so that "
+            "checkouts don't queue on this item, e.g. during a flash sale. "
+            "Takes effect at the next stripe compaction; 0 turns it off."
+        ),
+    )
 
     # Order constraints
     min_order_quantity = models.PositiveIntegerField(
@@ -105,6 +544,8 @@ class StockItem(
         help_text="Optional. Discount amount to subtract from the original price.",
     )
 
+    objects = StockItemQuerySet.as_manager()
+
     def __str__(self):
         return self.name
 
@@ -117,56 +558,145 @@ class StockItem(
                 "Minimum order quantity cannot exceed maximum order quantity."
             )
 
-    @property
+    @cached_property
+    def stripe_headroom(self):
+        """
+        Stock held on reservation stripes but not yet reserved.
+
+        Annotated by ``with_stock_fields()``. Otherwise it is summed from the
+        ``stripes`` prefetch if there is one, so that lists of items loaded
+        without the annotation can ``prefetch_related("stripes")`` rather than
+        cost a query per item.
+        """
+        if not self.pk:
+            return 0
+        prefetched = getattr(self, "_prefetched_objects_cache", {})
+        if "stripes" in prefetched:
+            return sum(
+                stripe.allotment - stripe.reserved_quantity
+                for stripe in prefetched["stripes"]
+            )
+        return self.stripes.aggregate(
+            total=Coalesce(Sum(F("allotment") - F("reserved_quantity")), 0)
+        )["total"]
+
+    @annotated_property
     def available_quantity(self):
         """Get quantity available for new orders."""
-        return max(0, self.quantity - self.reserved_quantity)
+        return max(0, self.quantity - self.reserved_quantity + self.stripe_headroom)
 
-    @property
+    @annotated_property
     def is_in_stock(self):
         """Check if item has available stock."""
         return self.available_quantity > 0
 
-    @property
+    @annotated_property
     def is_low_stock(self):
         """Check if item is running low on stock."""
         return self.available_quantity <= self.low_stock_threshold
 
-    @property
+    @annotated_property
     def current_price(self):
         """Get current price with discount applied."""
         if self.original_price is None or self.discount is None:
             return None
         return self.original_price - self.discount
 
-    @property
+    @annotated_property
     def discount_percentage(self):
         """Returns the discount as a negative percentage."""
         if not self.original_price or self.original_price == 0:
             return 0
         return -(self.discount / self.original_price * 100)
 
+    def clear_stock_annotations(self):
+        """Drop annotated values so the properties recompute from the fields."""
+        for name in StockItemQuerySet.STOCK_FIELDS:
+            self.__dict__.pop(name, None)
+        getattr(self, "_prefetched_objects_cache", {}).pop("stripes", None)
+
+    def refresh_stock(self):
+        """Reload the stock columns after an ``UPDATE`` that bypassed them."""
+        self.refresh_from_db(fields=["quantity", "reserved_quantity", "updated_at"])
+        self.clear_stock_annotations()
+
+    def save(self, *args, **kwargs):
+        """
+        Record edits to the stock columns in the movement ledger, and bump
+        ``NAMES_VERSION`` when the name, visibility or category changes.
+        """
+        previous = None
+        if not self._state.adding:
+            previous = (
+                type(self)
+                ._default_manager.filter(pk=self.pk)
+                .values_list(
+                    "quantity", "reserved_quantity", "name", "is_active", "category"
+                )
+                .first()
+            )
+        quantity, reserved, *names = previous or (0, 0, None, None, None)
+
+        with transaction.atomic():
+            # Registered before saving so that the bump runs ahead of the
+            # callbacks of the post_save receivers.
+            if names != [self.name, self.is_active, self.category_id]:
+                _names_updated(self._state.db)
+            super().save(*args, **kwargs)
+            StockMovement.objects.record_change(
+                self,
+                self.quantity - quantity,
+                self.reserved_quantity - reserved,
+            )
+
     def reserve_stock(self, quantity):
         """Reserve stock for an order. Returns True if successful."""
-        if quantity <= self.available_quantity:
-            self.reserved_quantity += quantity
-            self.save(update_fields=["reserved_quantity"])
-            return True
-        return False
+        try:
+            type(self)._default_manager.reserve({self.pk: quantity})
+        except InsufficientStockError:
+            return False
+        self.refresh_stock()
+        return True
 
     def release_stock(self, quantity):
         """Release reserved stock (e.g., when order is cancelled)."""
-        self.reserved_quantity = max(0, self.reserved_quantity - quantity)
-        self.save(update_fields=["reserved_quantity"])
+        type(self)._default_manager.release({self.pk: quantity})
+        self.refresh_stock()
 
     def consume_stock(self, quantity):
         """Consume stock when order is completed."""
-        if quantity <= self.quantity:
-            self.quantity -= quantity
-            self.reserved_quantity = max(0, self.reserved_quantity - quantity)
-            self.save(update_fields=["quantity", "reserved_quantity"])
-            return True
-        return False
+        try:
+            type(self)._default_manager.consume({self.pk: quantity})
+        except InsufficientStockError:
+            return False
+        self.refresh_stock()
+        return True
+
+    def stock_at(self, when):
+        """
+        Return ``(quantity, reserved_quantity)`` as they stood at ``when``:
+        the latest snapshot up to then plus the movements it doesn't include,
+        or None if ``when`` predates the first snapshot.
+
+        The movements are told apart from those in the snapshot by id, not
+        time: a movement's ``created_at`` is set before its transaction
+        commits, so it may be earlier than a snapshot that didn't see it.
+        """
+        snapshot = (
+            self.snapshots.filter(taken_at__lte=when).order_by("-taken_at").first()
+        )
+        if snapshot is None:
+            return None
+        totals = self.movements.filter(
+            pk__gt=snapshot.last_movement, created_at__lte=when
+        ).aggregate(
+            quantity=Coalesce(Sum("quantity_delta"), 0),
+            reserved=Coalesce(Sum("reserved_delta"), 0),
+        )
+        return (
+            snapshot.quantity + totals["quantity"],
+            snapshot.reserved_quantity + totals["reserved"],
+        )
 
 
 class StockItemImage(AbstractImage, AbstractCreatedAtUpdatedAt):
@@ -184,3 +714,283 @@ class StockItemImage(AbstractImage, AbstractCreatedAtUpdatedAt):
 
     def __str__(self):
         return f"{self.item.name} - Image {self.id}"
+
+
+class StockMovementQuerySet(models.QuerySet):
+    def record(self, kind, quantity=None, reserved=None, reference=""):
+        """
+        Append one movement per item with ``bulk_create``, from
+        ``{item_id: delta}`` mappings for the quantity and the reservations.
+        """
+        quantity = quantity or {}
+        reserved = reserved or {}
+        now = timezone.now()
+        movements = [
+            StockMovement(
+                item_id=pk,
+                kind=kind,
+                quantity_delta=quantity.get(pk, 0),
+                reserved_delta=reserved.get(pk, 0),
+                reference=reference,
+                created_at=now,
+            )
+            for pk in sorted(quantity.keys() | reserved.keys())
+            if quantity.get(pk) or reserved.get(pk)
+        ]
+        return self.bulk_create(movements)
+
+    def record_change(self, item, quantity, reserved):
+        """Record a direct edit of ``item``'s stock columns."""
+        if not (quantity or reserved):
+            return []
+        kind = (
+            StockMovement.RECEIPT
+            if quantity > 0 and not reserved
+            else StockMovement.ADJUSTMENT
+        )
+        return self.record(kind, {item.pk: quantity}, {item.pk: reserved})
+
+
+class StockMovement(models.Model):
+    """
+    Append-only ledger of changes to ``StockItem.quantity`` and
+    ``reserved_quantity``. Rows are only ever inserted; together with the
+    ``StockSnapshot`` rows they give the stock of an item at any point in time
+    (see ``StockItem.stock_at``).
+    """
+
+    RECEIPT = "receipt"
+    RESERVATION = "reservation"
+    RELEASE = "release"
+    CONSUMPTION = "consumption"
+    ADJUSTMENT = "adjustment"
+    KIND_CHOICES = [
+        (RECEIPT, "Receipt"),
+        (RESERVATION, "Reservation"),
+        (RELEASE, "Release"),
+        (CONSUMPTION, "Consumption"),
+        (ADJUSTMENT, "Adjustment"),
+    ]
+
+    item = models.ForeignKey(
+        StockItem,
+        on_delete=models.CASCADE,
+        related_name="movements",
+        help_text="Item whose stock moved.",
+    )
+    kind = models.CharField(
+        max_length=20, choices=KIND_CHOICES, help_text="What moved the stock."
+    )
+    quantity_delta = models.IntegerField(
+        default=0, help_text="Change to the quantity in stock."
+    )
+    reserved_delta = models.IntegerField(
+        default=0, help_text="Change to the reserved quantity."
+    )
+    reference = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text="Optional. What caused the movement, e.g. an order id.",
+    )
+    created_at = models.DateTimeField(
+        default=timezone.now, help_text="Date and time of the movement."
+    )
+
+    objects = StockMovementQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["created_at", "id"]
+        indexes = [
+            # Serves the range scan after a snapshot in StockItem.stock_at().
+            models.Index(fields=["item", "created_at"], name="stock_movement_item_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} of {self.item.name}"
+
+
+class StockSnapshot(models.Model):
+    """
+    Stock of an item at a point in time, taken periodically by the
+    ``snapshot_stock`` command so that past stock levels are read from the
+    nearest snapshot and the movements after it, not replayed from the start.
+    """
+
+    item = models.ForeignKey(
+        StockItem,
+        on_delete=models.CASCADE,
+        related_name="snapshots",
+        help_text="Item the snapshot is of.",
+    )
+    taken_at = models.DateTimeField(help_text="Date and time of the snapshot.")
+    quantity = models.IntegerField(help_text="Quantity in stock.")
+    reserved_quantity = models.IntegerField(help_text="Reserved quantity.")
+    last_movement = models.BigIntegerField(
+        default=0,
+        help_text="Id of the last stock movement the snapshot includes.",
+    )
+
+    class Meta:
+        ordering = ["taken_at", "id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["item", "taken_at"], name="stock_snapshot_item_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.item.name} at {self.taken_at:%Y-%m-%d %H:%M}"
+
+
+class StockReservationStripeQuerySet(models.QuerySet):
+    def reserve(self, quantities, stripe_counts):
+        """
+        Reserve ``{item_id: quantity}`` on one randomly picked stripe of each
+        item, in one UPDATE that checks the stripes' allotments. Returns
+        whether every item fit; if not, nothing is reserved.
+        """
+        condition = Q()
+        for pk, quantity in quantities.items():
+            condition |= Q(
+                item_id=pk,
+                stripe=random.randrange(stripe_counts[pk]),
+                allotment__gte=F("reserved_quantity") + quantity,
+            )
+
+        with transaction.atomic(using=self.db):
+            updated = self.filter(condition).update(
+                reserved_quantity=F("reserved_quantity")
+                + _quantity_case(quantities, field="item_id"),
+                updated_at=Now(),
+            )
+            if updated != len(quantities):
+                transaction.set_rollback(True, using=self.db)
+        return updated == len(quantities)
+
+    def compact(self, item_ids=None, reallot=True):
+        """
+        Fold the reservations taken on stripes into their items' rows and, if
+        ``reallot``, split each item's available stock afresh: an equal
+        allotment for each of its ``stripe_count`` stripes, with one more
+        share left on the row itself. Without ``reallot`` the rows get all of
+        it back.
+
+        Looks only at items that have stripes or should have them, and returns
+        how many there were. Only the items whose stripes or reserved quantity
+        change are written.
+        """
+        items = StockItem.objects.using(self.db).filter(
+            Q(stripe_count__gt=0) | Q(pk__in=self.values("item"))
+        )
+        if item_ids is not None:
+            items = items.filter(pk__in=item_ids)
+
+        with transaction.atomic(using=self.db):
+            rows = list(
+                items.select_for_update()
+                .order_by("pk")
+                .values_list("pk", "quantity", "reserved_quantity", "stripe_count")
+            )
+            if not rows:
+                return 0
+            pks = [row[0] for row in rows]
+
+            stripes = {}
+            for item_id, stripe, allotment, reserved in (
+                self.filter(item_id__in=pks)
+                .select_for_update()
+                .order_by("item", "stripe")
+                .values_list("item", "stripe", "allotment", "reserved_quantity")
+            ):
+                stripes.setdefault(item_id, []).append((stripe, allotment, reserved))
+
+            reserved_quantities, shares = {}, {}
+            for pk, quantity, reserved, stripe_count in rows:
+                current = stripes.get(pk, [])
+                allotted = sum(allotment for _, allotment, _ in current)
+                used = sum(reserved for _, _, reserved in current)
+                settled = max(0, reserved - allotted + used)
+                count = stripe_count if reallot else 0
+                share = max(0, quantity - settled) // (count + 1) if count else 0
+                # Items whose stripes already hold their new allotment, with
+                # nothing reserved through them, have nothing to change.
+                if current == [(stripe, share, 0) for stripe in range(count)]:
+                    continue
+                shares[pk] = (count, share)
+                if settled + count * share != reserved:
+                    reserved_quantities[pk] = settled + count * share
+            if not shares:
+                return len(rows)
+
+            if reserved_quantities:
+                StockItem.objects.using(self.db).filter(
+                    pk__in=reserved_quantities
+                ).update(
+                    reserved_quantity=_quantity_case(reserved_quantities),
+                    updated_at=Now(),
+                )
+
+            # Update the stripes in place rather than recreating them, so that
+            # reservations waiting on their locks go on to the new allotment.
+            self.bulk_create(
+                [
+                    StockReservationStripe(
+                        item_id=pk, stripe=stripe, allotment=share, reserved_quantity=0
+                    )
+                    for pk, (count, share) in shares.items()
+                    for stripe in range(count)
+                ],
+                update_conflicts=True,
+                unique_fields=["item", "stripe"],
+                update_fields=["allotment", "reserved_quantity", "updated_at"],
+            )
+            surplus = Q()
+            for pk, (count, _) in shares.items():
+                surplus |= Q(item_id=pk, stripe__gte=count)
+            self.filter(surplus).delete()
+
+            _stock_updated(self.db)
+        return len(rows)
+
+
+class StockReservationStripe(models.Model):
+    """
+    One of the counters that take reservations for an item with
+    ``stripe_count`` set, so that concurrent checkouts of a hot item each
+    lock one of several rows rather than all queuing on the item's own.
+
+    Each stripe is handed an ``allotment`` of the item's available stock,
+    which the item row counts as reserved, and reserves against that alone.
+    ``StockReservationStripeQuerySet.compact()`` periodically folds what the
+    stripes reserved back into the item row and hands out new allotments
+    (see the ``compact_stock_stripes`` command).
+    """
+
+    item = models.ForeignKey(
+        StockItem,
+        on_delete=models.CASCADE,
+        related_name="stripes",
+        help_text="Item the stripe takes reservations for.",
+    )
+    stripe = models.PositiveSmallIntegerField(help_text="Number of the stripe.")
+    allotment = models.PositiveIntegerField(
+        default=0, help_text="Stock handed to the stripe to reserve from."
+    )
+    reserved_quantity = models.PositiveIntegerField(
+        default=0, help_text="Quantity reserved through the stripe."
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True, help_text="Date and time last updated."
+    )
+
+    objects = StockReservationStripeQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["item", "stripe"], name="stock_stripe_item_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.item.name} - Stripe {self.stripe}"
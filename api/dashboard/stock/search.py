@@ -0,0 +1,266 @@
+"""
+Full-text search over stock items.
+
+The inverted index lives in the database and is kept up to date by triggers,
+so every write path - ``save()``, ``QuerySet.update()``, fixtures and raw SQL -
+updates it incrementally:
+
+- SQLite: an FTS5 table ``stock_stockitem_fts`` keyed on the item id.
+- PostgreSQL: a ``search_vector`` tsvector column with a GIN index.
+
+Other backends fall back to ``icontains`` lookups.
+"""
+
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+SQLITE_FTS_TABLE = "stock_stockitem_fts"
+
+SQLITE_INSTALL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE}
+    USING fts5(name, description, category, tokenize='unicode61 remove_diacritics 2')
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS stock_stockitem_fts_insert
+    AFTER INSERT ON stock_stockitem BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE} (rowid, name, description, category)
+        VALUES (
+            new.id,
+            new.name,
+            new.description,
+            (SELECT name FROM stock_stockcategory WHERE id = new.category_id)
+        );
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS stock_stockitem_fts_update
+    AFTER UPDATE OF name, description, category_id ON stock_stockitem BEGIN
+        UPDATE {SQLITE_FTS_TABLE}
+        SET
+            name = new.name,
+            description = new.description,
+            category = (SELECT name FROM stock_stockcategory WHERE id = new.category_id)
+        WHERE rowid = new.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS stock_stockitem_fts_delete
+    AFTER DELETE ON stock_stockitem BEGIN
+        DELETE FROM {SQLITE_FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS stock_stockcategory_fts_update
+    AFTER UPDATE OF name ON stock_stockcategory BEGIN
+        UPDATE {SQLITE_FTS_TABLE}
+        SET category = new.name
+        WHERE rowid IN (SELECT id FROM stock_stockitem WHERE category_id = new.id);
+    END
+    """,
+]
+
+SQLITE_REBUILD = [
+    f"DELETE FROM {SQLITE_FTS_TABLE}",
+    f"""
+    INSERT INTO {SQLITE_FTS_TABLE} (rowid, name, description, category)
+    SELECT item.id, item.name, item.description, category.name
+    FROM stock_stockitem AS item
+    JOIN stock_stockcategory AS category ON category.id = item.category_id
+    """,
+]
+
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS stock_stockcategory_fts_update",
+    "DROP TRIGGER IF EXISTS stock_stockitem_fts_delete",
+    "DROP TRIGGER IF EXISTS stock_stockitem_fts_update",
+    "DROP TRIGGER IF EXISTS stock_stockitem_fts_insert",
+    f"DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}",
+]
+
+POSTGRESQL_INSTALL = [
+    "ALTER TABLE stock_stockitem ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    """
+    CREATE INDEX IF NOT EXISTS stock_item_search_idx
+    ON stock_stockitem USING GIN (search_vector)
+    """,
+    """
+    CREATE OR REPLACE FUNCTION stock_stockitem_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(
+                (SELECT name FROM stock_stockcategory WHERE id = NEW.category_id), ''
+            )), 'B') ||
+            setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS stock_stockitem_search_vector ON stock_stockitem",
+    """
+    CREATE TRIGGER stock_stockitem_search_vector
+    BEFORE INSERT OR UPDATE OF name, description, category_id ON stock_stockitem
+    FOR EACH ROW EXECUTE FUNCTION stock_stockitem_search_vector()
+    """,
+    """
+    CREATE OR REPLACE FUNCTION stock_stockcategory_search_vector() RETURNS trigger AS $$
+    BEGIN
+        -- Touch the items so their own trigger picks up the new category name.
+        UPDATE stock_stockitem SET category_id = category_id
+        WHERE category_id = NEW.id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS stock_stockcategory_search_vector ON stock_stockcategory",
+    """
+    CREATE TRIGGER stock_stockcategory_search_vector
+    AFTER UPDATE OF name ON stock_stockcategory
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE FUNCTION stock_stockcategory_search_vector()
+    """,
+]
+
+POSTGRESQL_REBUILD = [
+    "UPDATE stock_stockitem SET category_id = category_id",
+]
+
+POSTGRESQL_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS stock_stockcategory_search_vector ON stock_stockcategory",
+    "DROP FUNCTION IF EXISTS stock_stockcategory_search_vector()",
+    "DROP TRIGGER IF EXISTS stock_stockitem_search_vector ON stock_stockitem",
+    "DROP FUNCTION IF EXISTS stock_stockitem_search_vector()",
+    "DROP INDEX IF EXISTS stock_item_search_idx",
+    "ALTER TABLE stock_stockitem DROP COLUMN IF EXISTS search_vector",
+]
+
+STATEMENTS = {
+    "sqlite": (SQLITE_INSTALL, SQLITE_REBUILD, SQLITE_UNINSTALL),
+    "postgresql": (POSTGRESQL_INSTALL, POSTGRESQL_REBUILD, POSTGRESQL_UNINSTALL),
+}
+
+
+def _execute(connection, statements):
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def is_installed(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            return SQLITE_FTS_TABLE in connection.introspection.table_names(cursor)
+        if connection.vendor == "postgresql":
+            columns = connection.introspection.get_table_description(
+                cursor, "stock_stockitem"
+            )
+            return any(column.name == "search_vector" for column in columns)
+    return False
+
+
+def install(connection):
+    """Create the index objects that are missing. Safe to run repeatedly."""
+    if connection.vendor in STATEMENTS:
+        _execute(connection, STATEMENTS[connection.vendor][0])
+
+
+def drop_triggers(connection):
+    """
+    Drop the SQLite triggers ahead of migrations that may rebuild the item
+    table: SQLite won't rename the rebuilt table into place while a trigger
+    on another table refers to it. ``install()`` puts them back.
+    """
+    if connection.vendor == "sqlite":
+        _execute(connection, SQLITE_UNINSTALL[:-1])
+
+
+def rebuild(connection):
+    """Re-index every stock item from scratch."""
+    if connection.vendor in STATEMENTS:
+        _execute(connection, STATEMENTS[connection.vendor][1])
+
+
+def uninstall(connection):
+    if connection.vendor in STATEMENTS:
+        _execute(connection, STATEMENTS[connection.vendor][2])
+
+
+def get_terms(query):
+    """Split user input into plain word terms, dropping any query syntax."""
+    return re.findall(r"\w+", query.lower())
+
+
+def match_expressions(connection, table, terms):
+    """
+    Return ``(matches, rank)`` SQL expressions for rows of ``table``: whether
+    the row matches and how well. Every term must match, and the last one
+    matches as a prefix so results follow the user's typing.
+    """
+    if connection.vendor == "sqlite":
+        match = " AND ".join(f'"{term}"' for term in terms) + "*"
+        matches = RawSQL(
+            f"{table}.id IN (SELECT rowid FROM {SQLITE_FTS_TABLE} "
+            f"WHERE {SQLITE_FTS_TABLE} MATCH %s)",
+            [match],
+            output_field=BooleanField(),
+        )
+        rank = RawSQL(
+            f"SELECT -bm25({SQLITE_FTS_TABLE}, 10.0, 1.0, 5.0) "
+            f"FROM {SQLITE_FTS_TABLE} "
+            f"WHERE {SQLITE_FTS_TABLE} MATCH %s AND rowid = {table}.id",
+            [match],
+            output_field=FloatField(),
+        )
+    else:
+        match = " & ".join(terms) + ":*"
+        matches = RawSQL(
+            f"{table}.search_vector @@ to_tsquery('english', %s)",
+            [match],
+            output_field=BooleanField(),
+        )
+        rank = RawSQL(
+            f"ts_rank({table}.search_vector, to_tsquery('english', %s))",
+            [match],
+            output_field=FloatField(),
+        )
+    return matches, rank
+
+
+def search_stock_items(queryset, query, limit=20):
+    """
+    Return up to ``limit`` items from ``queryset`` matching ``query``, best
+    match first, each with a ``search_rank`` attribute.
+
+    The match is one more filter on ``queryset``, so the items returned are
+    the best matches among those passing its other filters, however many
+    items match overall.
+    """
+    terms = get_terms(query)
+    if not terms:
+        return []
+
+    connection = connections[queryset.db]
+    if connection.vendor not in STATEMENTS:
+        condition = Q()
+        for term in terms:
+            condition &= (
+                Q(name__icontains=term)
+                | Q(description__icontains=term)
+                | Q(category__name__icontains=term)
+            )
+        items = list(queryset.filter(condition)[:limit])
+        for item in items:
+            item.search_rank = 0
+        return items
+
+    matches, rank = match_expressions(connection, queryset.model._meta.db_table, terms)
+    return list(
+        queryset.alias(search_match=matches)
+        .filter(search_match=True)
+        .annotate(search_rank=rank)
+        .order_by("-search_rank", "pk")[:limit]
+    )
@@ -1,9 +1,18 @@
 from rest_framework import serializers
 
-from .models import StockCategory, StockItem
+from home.globals.serializers import (
+    DynamicFieldsMixin,
+    FastHyperlinkedModelSerializer,
+    FastHyperlinkedRelatedField,
+)
 
+from .models import StockCategory, StockItem, StockItemImage
 
-class StockCategorySerializer(serializers.ModelSerializer):
+IMAGE_FIELDS = ["image", "image_width", "image_height"]
+DERIVATIVE_FIELDS = [*IMAGE_FIELDS, "image_derivatives"]
+
+
+class StockCategorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for StockCategory model."""
 
     class Meta:
@@ -11,10 +20,47 @@ class StockCategorySerializer(serializers.ModelSerializer):
         fields = ["id", "name", "description", "bootstrap_icon", "is_active"]
 
 
-class StockItemSerializer(serializers.HyperlinkedModelSerializer):
-    """Serializer for StockItem model."""
+class StockItemImageSerializer(serializers.ModelSerializer):
+    """Serializer for StockItemImage model."""
+
+    image_url = serializers.CharField(read_only=True)
+    image_urls = serializers.DictField(child=serializers.CharField(), read_only=True)
+    srcset = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = StockItemImage
+        fields = [
+            "id",
+            "image_url",
+            "image_urls",
+            "srcset",
+            "image_alt_text",
+            "image_width",
+            "image_height",
+            "image_placeholder",
+            "image_color",
+        ]
+
+
+class StockItemSerializer(DynamicFieldsMixin, FastHyperlinkedModelSerializer):
+    """
+    Serializer for StockItem model.
+
+    Supports ``?fields=``, ``?omit=`` and ``?expand=category``.
+    """
+
+    expandable_fields = {"category": StockCategorySerializer}
+    # ``images`` reads the ``active_images`` prefetch set up by the viewset.
+    # Loading ``image`` without its dimension fields would cost a query per
+    # row, as ImageField reads them when the instance is created.
+    field_dependencies = {
+        "image_url": IMAGE_FIELDS,
+        "image_urls": DERIVATIVE_FIELDS,
+        "srcset": DERIVATIVE_FIELDS,
+        "images": [],
+    }
 
-    category = serializers.HyperlinkedRelatedField(
+    category = FastHyperlinkedRelatedField(
         view_name="stockcategory-detail", queryset=StockCategory.objects.all()
     )
     current_price = serializers.DecimalField(
@@ -26,6 +72,10 @@ class StockItemSerializer(serializers.HyperlinkedModelSerializer):
     discount_percentage = serializers.DecimalField(
         max_digits=5, decimal_places=2, read_only=True
     )
+    image_url = serializers.CharField(read_only=True)
+    image_urls = serializers.DictField(child=serializers.CharField(), read_only=True)
+    srcset = serializers.CharField(read_only=True)
+    images = StockItemImageSerializer(source="active_images", many=True, read_only=True)
 
     class Meta:
         model = StockItem
@@ -34,6 +84,15 @@ class StockItemSerializer(serializers.HyperlinkedModelSerializer):
             "name",
             "description",
             "bootstrap_icon",
+            "image_url",
+            "image_urls",
+            "srcset",
+            "image_alt_text",
+            "image_width",
+            "image_height",
+            "image_placeholder",
+            "image_color",
+            "images",
             "category",
             "original_price",
             "discount",
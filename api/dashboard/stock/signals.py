@@ -0,0 +1,63 @@
+from functools import partial
+
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from home.globals.cache import bump_version
+
+from . import search, suggest
+from .models import NAMES_VERSION, StockCategory, StockItem, StockItemImage
+
+
+@receiver(post_migrate, dispatch_uid="stock_install_search_index")
+def install_search_index(sender, app_config, using, **kwargs):
+    """
+    Restore the search triggers after SQLite migrations that rebuild the item
+    table, which silently drops them, and re-index the rows written meanwhile.
+    """
+    connection = connections[using]
+    if app_config.name != "dashboard.stock":
+        return
+
+    if search.is_installed(connection):
+        search.install(connection)
+        if connection.vendor == "sqlite":
+            search.rebuild(connection)
+
+
+@receiver(post_save, sender=StockItem, dispatch_uid="stock_suggest_item_saved")
+def update_suggestions_on_item_save(sender, instance, raw=False, using=None, **kwargs):
+    if raw:
+        # Fixtures don't go through StockItem.save(), which bumps the version.
+        transaction.on_commit(partial(bump_version, NAMES_VERSION), using=using)
+    else:
+        transaction.on_commit(partial(suggest.apply_item_change, instance), using=using)
+
+
+@receiver(post_delete, sender=StockItem, dispatch_uid="stock_suggest_item_deleted")
+def update_suggestions_on_item_delete(sender, instance, using=None, **kwargs):
+    transaction.on_commit(partial(bump_version, NAMES_VERSION), using=using)
+    transaction.on_commit(
+        partial(suggest.apply_item_change, instance, deleted=True), using=using
+    )
+
+
+@receiver(post_save, sender=StockCategory, dispatch_uid="stock_suggest_category_saved")
+@receiver(
+    post_delete, sender=StockCategory, dispatch_uid="stock_suggest_category_deleted"
+)
+def update_suggestions_on_category_change(sender, using=None, **kwargs):
+    transaction.on_commit(partial(bump_version, NAMES_VERSION), using=using)
+
+
+@receiver(post_save, sender=StockItemImage, dispatch_uid="stock_image_saved")
+@receiver(post_delete, sender=StockItemImage, dispatch_uid="stock_image_deleted")
+def touch_item_on_image_change(sender, instance, raw=False, **kwargs):
+    """
+    Gallery images are embedded in item responses, so a change must move the
+    item's ``updated_at`` for conditional GETs to notice it.
+    """
+    if not raw:
+        StockItem.objects.filter(pk=instance.item_id).update(updated_at=timezone.now())
@@ -0,0 +1,196 @@
+"""
+In-memory prefix index behind the typeahead endpoint.
+
+Each worker keeps a sorted array of every word suffix of active item and
+category names ("blue ball pen" is stored as "blue ball pen", "ball pen" and
+"pen"), so a lookup is one binary search plus a short scan and never touches
+the database.
+
+The index is built on first use in each worker. Item saves and deletes in the
+same worker are applied incrementally from signals once committed; changes
+made by other workers are picked up by comparing ``NAMES_VERSION`` on each
+lookup and rebuilding when it moved on. That version only changes with names
+and their visibility, so orders reserving stock never cause a rebuild.
+
+The version is only shared between workers whose cache is (see ``CACHES``),
+so the index is also rebuilt once it is ``SUGGEST_INDEX_MAX_AGE`` seconds
+old: with a per-process cache, that bounds how long other workers' changes
+take to show up.
+"""
+
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+
+from django.conf import settings
+
+from home.globals.cache import get_version
+
+from .models import NAMES_VERSION, StockCategory, StockItem
+
+ITEM = "item"
+CATEGORY = "category"
+
+
+def normalize(text):
+    """Lowercase, strip accents and collapse punctuation to single spaces."""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(re.findall(r"\w+", text))
+
+
+class PrefixIndex:
+    def __init__(self):
+        # ``(keys, labels)``: the sorted key tuple and the label of each
+        # entry. Never modified in place, only swapped whole, so a lookup
+        # reading it from another thread can't see half of a rebuild.
+        self.contents = ((), {})
+        self.version = None
+        self.built_at = None
+        self.lock = threading.Lock()
+
+    def _entry_keys(self, kind, pk, label):
+        words = normalize(label).split(" ")
+        return [(" ".join(words[i:]), kind, pk) for i in range(len(words))]
+
+    def replace(self, kind, pk, label=None):
+        """
+        Remove the entry for ``(kind, pk)`` and add it back under ``label``
+        unless that is None. Works on copies that are swapped in at the end,
+        so concurrent lookups always see a consistent snapshot.
+        """
+        keys, labels = self.contents
+        keys, labels = list(keys), dict(labels)
+
+        old_label = labels.pop((kind, pk), None)
+        if old_label is not None:
+            for key in self._entry_keys(kind, pk, old_label):
+                position = bisect_left(keys, key)
+                if position < len(keys) and keys[position] == key:
+                    del keys[position]
+
+        if label is not None:
+            labels[(kind, pk)] = label
+            for key in self._entry_keys(kind, pk, label):
+                insort(keys, key)
+
+        self.contents = (tuple(keys), labels)
+
+    def build(self, entries):
+        """Replace the contents with ``(kind, pk, label)`` entries."""
+        keys, labels = [], {}
+        for kind, pk, label in entries:
+            labels[(kind, pk)] = label
+            keys.extend(self._entry_keys(kind, pk, label))
+        keys.sort()
+        self.contents = (tuple(keys), labels)
+        self.built_at = time.monotonic()
+
+    def lookup(self, query, limit=8):
+        """
+        Return up to ``limit`` ``(kind, pk, label)`` entries whose name has a
+        word starting with ``query``. Names that start with the query come
+        first, then shorter names.
+        """
+        prefix = normalize(query)
+        if not prefix:
+            return []
+
+        keys, labels = self.contents
+        matches = {}
+        position = bisect_left(keys, (prefix,))
+        # Scan a bounded window so that very short prefixes stay cheap.
+        while position < len(keys) and len(matches) < limit * 5:
+            key, kind, pk = keys[position]
+            if not key.startswith(prefix):
+                break
+            label = labels[(kind, pk)]
+            starts_name = normalize(label) == key
+            best = matches.get((kind, pk), False)
+            matches[(kind, pk)] = best or starts_name
+            position += 1
+
+        ranked = sorted(
+            matches.items(),
+            key=lambda match: (
+                not match[1],
+                len(labels[match[0]]),
+                labels[match[0]],
+            ),
+        )
+        return [(kind, pk, labels[(kind, pk)]) for (kind, pk), _ in ranked[:limit]]
+
+
+index = PrefixIndex()
+
+
+def _current_version():
+    return get_version(NAMES_VERSION)
+
+
+def _load_entries():
+    categories = StockCategory.objects.filter(is_active=True).values_list("pk", "name")
+    items = StockItem.objects.filter(
+        is_active=True, category__is_active=True
+    ).values_list("pk", "name")
+    return [(CATEGORY, pk, name) for pk, name in categories] + [
+        (ITEM, pk, name) for pk, name in items
+    ]
+
+
+def _is_current(version):
+    max_age = getattr(settings, "SUGGEST_INDEX_MAX_AGE", 60)
+    return index.version == version and (
+        not max_age or time.monotonic() - index.built_at < max_age
+    )
+
+
+def get_index():
+    """
+    Return the worker's index, rebuilding it if another worker wrote or it
+    is too old.
+    """
+    version = _current_version()
+    if not _is_current(version):
+        with index.lock:
+            if not _is_current(version):
+                index.build(_load_entries())
+                index.version = version
+    return index
+
+
+def suggest(query, limit=8):
+    return [
+        {"type": kind, "id": pk, "name": label}
+        for kind, pk, label in get_index().lookup(query, limit=limit)
+    ]
+
+
+def apply_item_change(item, deleted=False):
+    """
+    Apply a committed item save or delete to the index without a rebuild.
+
+    Runs after ``NAMES_VERSION`` was bumped for the change, so if the version
+    moved by exactly this one change the index is marked current; otherwise
+    another worker also wrote and the next lookup rebuilds.
+    """
+    with index.lock:
+        if index.version is None:
+            return
+
+        visible = (
+            not deleted
+            and item.is_active
+            and StockCategory.objects.filter(
+                pk=item.category_id, is_active=True
+            ).exists()
+        )
+        label = item.name if visible else None
+        if index.contents[1].get((ITEM, item.pk)) == label:
+            return
+        index.replace(ITEM, item.pk, label)
+
+        current = _current_version()
+        index.version = current if current == index.version + 1 else None
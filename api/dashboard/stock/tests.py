@@ -0,0 +1,362 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from . import suggest
+from .models import (
+    InsufficientStockError,
+    StockCategory,
+    StockItem,
+    StockMovement,
+    StockReservationStripe,
+)
+
+
+class SetDiscountPercentageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = StockCategory.objects.create(name="Category")
+
+    def create_item(self, original_price):
+        return StockItem.objects.create(
+            category=self.category, name="Item", original_price=original_price
+        )
+
+    def test_sets_discount(self):
+        item = self.create_item(Decimal("200.00"))
+
+        self.assertEqual(StockItem.objects.set_discount_percentage(15), 1)
+
+        item.refresh_from_db()
+        self.assertEqual(item.discount, Decimal("30.00"))
+
+    def test_rejects_discount_rounded_up_to_limit(self):
+        # 10% of 9999.95 is 999.995, which rounds to 1000.00: one digit more
+        # than the discount field holds.
+        item = self.create_item(Decimal("9999.95"))
+
+        with self.assertRaises(ValueError):
+            StockItem.objects.set_discount_percentage(10)
+
+        item.refresh_from_db()
+        self.assertEqual(item.discount, Decimal("0.00"))
+
+    def test_accepts_discount_just_below_limit(self):
+        item = self.create_item(Decimal("9999.94"))
+
+        StockItem.objects.set_discount_percentage(10)
+
+        item.refresh_from_db()
+        self.assertEqual(item.discount, Decimal("999.99"))
+
+
+class StockReservationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = StockCategory.objects.create(name="Stationery")
+        cls.pen = StockItem.objects.create(
+            category=category, name="Pen", quantity=10, original_price=2
+        )
+        cls.pad = StockItem.objects.create(
+            category=category, name="Pad", quantity=5, original_price=3
+        )
+
+    def assertStock(self, item, quantity, reserved):
+        item.refresh_from_db()
+        self.assertEqual((item.quantity, item.reserved_quantity), (quantity, reserved))
+
+    def test_reserves_whole_cart_or_nothing(self):
+        StockItem.objects.reserve({self.pen.pk: 3, self.pad.pk: 2}, reference="A")
+        self.assertStock(self.pen, 10, 3)
+        self.assertStock(self.pad, 5, 2)
+
+        with self.assertRaises(InsufficientStockError) as cm:
+            StockItem.objects.reserve({self.pen.pk: 7, self.pad.pk: 4}, reference="B")
+
+        self.assertEqual(cm.exception.shortages, {self.pad.pk: 1})
+        self.assertStock(self.pen, 10, 3)
+        self.assertStock(self.pad, 5, 2)
+        self.assertFalse(StockMovement.objects.filter(reference="B").exists())
+
+    def test_releases_no_more_than_reserved(self):
+        StockItem.objects.reserve({self.pen.pk: 3})
+
+        StockItem.objects.release({self.pen.pk: 5})
+
+        self.assertStock(self.pen, 10, 0)
+        self.assertEqual(
+            list(
+                self.pen.movements.filter(kind=StockMovement.RELEASE).values_list(
+                    "reserved_delta", flat=True
+                )
+            ),
+            [-3],
+        )
+
+    def test_consumes_reserved_stock(self):
+        StockItem.objects.reserve({self.pen.pk: 3})
+
+        StockItem.objects.consume({self.pen.pk: 3})
+
+        self.assertStock(self.pen, 7, 0)
+        self.assertFalse(self.pen.consume_stock(8))
+        self.assertStock(self.pen, 7, 0)
+
+    def test_reserve_stock_reports_shortage(self):
+        self.assertTrue(self.pad.reserve_stock(5))
+        self.assertFalse(self.pad.reserve_stock(1))
+        self.assertEqual(self.pad.available_quantity, 0)
+
+
+class StripedReservationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = StockCategory.objects.create(name="Stationery")
+        cls.item = StockItem.objects.create(
+            category=category,
+            name="Pen",
+            quantity=10,
+            original_price=2,
+            stripe_count=2,
+        )
+
+    def setUp(self):
+        StockReservationStripe.objects.compact()
+
+    def available(self):
+        item = StockItem.objects.get(pk=self.item.pk)
+        annotated = StockItem.objects.with_stock_fields().get(pk=self.item.pk)
+        self.assertEqual(item.available_quantity, annotated.available_quantity)
+        return item.available_quantity
+
+    def test_compaction_allots_stock_to_stripes(self):
+        self.assertEqual(
+            list(self.item.stripes.values_list("allotment", "reserved_quantity")),
+            [(3, 0), (3, 0)],
+        )
+        self.assertEqual(self.available(), 10)
+
+    def test_reserves_on_a_stripe(self):
+        StockItem.objects.reserve({self.item.pk: 2})
+
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.reserved_quantity, 6)
+        self.assertEqual(
+            sorted(self.item.stripes.values_list("reserved_quantity", flat=True)),
+            [0, 2],
+        )
+        self.assertEqual(self.available(), 8)
+
+    def test_falls_back_to_item_row(self):
+        StockItem.objects.reserve({self.item.pk: 5})
+
+        self.assertEqual(self.available(), 5)
+        with self.assertRaises(InsufficientStockError) as cm:
+            StockItem.objects.reserve({self.item.pk: 6})
+        self.assertEqual(cm.exception.shortages, {self.item.pk: 1})
+        self.assertEqual(self.available(), 5)
+
+    def test_compaction_folds_reservations_into_item(self):
+        StockItem.objects.reserve({self.item.pk: 2})
+        StockItem.objects.release({self.item.pk: 1})
+
+        StockItem.objects.filter(pk=self.item.pk).update(stripe_count=0)
+        StockReservationStripe.objects.compact()
+
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.reserved_quantity, 1)
+        self.assertFalse(self.item.stripes.exists())
+        self.assertEqual(self.available(), 9)
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = StockCategory.objects.create(name="Category")
+
+    def setUp(self):
+        cache.clear()
+        self.client.defaults["HTTP_HOST"] = "localhost"
+
+    def create_items(self, count, **fields):
+        return [
+            StockItem.objects.create(category=self.category, name=f"Item {i}", **fields)
+            for i in range(count)
+        ]
+
+    def page_through(self, url):
+        names = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            names.extend(item["name"] for item in response.json()["results"])
+            url = response.json()["next"]
+            self.assertLessEqual(len(names), 100, "pagination doesn't end")
+        return names
+
+    def test_pages_through_datetimes_within_one_millisecond(self):
+        items = self.create_items(10, original_price=Decimal("10.00"))
+        start = timezone.now().replace(microsecond=1000)
+        for offset, item in enumerate(items):
+            StockItem.objects.filter(pk=item.pk).update(
+                created_at=start + timedelta(microseconds=offset * 50)
+            )
+
+        names = self.page_through(
+            "/stock/items/?ordering=created_at&page_size=3&fields=name"
+        )
+
+        self.assertEqual(names, [item.name for item in items])
+
+    def test_pages_through_rounded_discount_percentages(self):
+        # 0.01 to 0.10 off 3.00: percentages with a third of a cent that are
+        # rounded to two decimals when loaded.
+        items = self.create_items(10, original_price=Decimal("3.00"))
+        for cents, item in enumerate(items, start=1):
+            StockItem.objects.filter(pk=item.pk).update(discount=Decimal(cents) / 100)
+
+        names = self.page_through(
+            "/stock/items/?ordering=discount_percentage&page_size=3&fields=name"
+        )
+
+        self.assertEqual(names, [item.name for item in reversed(items)])
+
+    def test_pages_back_through_ties(self):
+        items = self.create_items(7, original_price=Decimal("10.00"))
+        first = self.client.get("/stock/items/?page_size=3&fields=name").json()
+        second = self.client.get(first["next"]).json()
+
+        previous = self.client.get(second["previous"]).json()
+
+        self.assertEqual(
+            [item["name"] for item in previous["results"]],
+            [item.name for item in items[:3]],
+        )
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.pens = StockCategory.objects.create(name="Pens")
+        cls.paper = StockCategory.objects.create(name="Paper")
+        StockItem.objects.bulk_create(
+            StockItem(category=cls.pens, name=f"Ball pen {i}", original_price=1)
+            for i in range(1001)
+        )
+        cls.pad = StockItem.objects.create(
+            category=cls.paper,
+            name="Writing pad",
+            description="Lined pages that take any pen.",
+            original_price=1,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.defaults["HTTP_HOST"] = "localhost"
+
+    def search(self, query):
+        response = self.client.get(f"/stock/items/search/?{query}")
+        self.assertEqual(response.status_code, 200)
+        return [item["name"] for item in response.json()["results"]]
+
+    def test_filters_apply_before_ranking(self):
+        # Over a thousand better matches in another category.
+        names = self.search(f"q=pen&category={self.paper.pk}")
+
+        self.assertEqual(names, ["Writing pad"])
+
+    def test_ranks_name_matches_first(self):
+        names = self.search("q=pen&limit=3")
+
+        self.assertEqual(len(names), 3)
+        self.assertTrue(all(name.startswith("Ball pen") for name in names))
+
+    def test_matches_last_term_as_prefix(self):
+        self.assertEqual(self.search("q=writ"), ["Writing pad"])
+
+
+class SuggestTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = StockCategory.objects.create(name="Stationery")
+        cls.item = StockItem.objects.create(
+            category=cls.category, name="Blue pen", quantity=10, original_price=1
+        )
+
+    def setUp(self):
+        cache.clear()
+        suggest.index.version = None
+
+    def names(self, query):
+        return [result["name"] for result in suggest.suggest(query)]
+
+    def test_applies_renames_in_place(self):
+        self.assertEqual(self.names("blue"), ["Blue pen"])
+        built_at = suggest.index.built_at
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.name = "Red pen"
+            self.item.save()
+
+        self.assertEqual(self.names("blue"), [])
+        self.assertEqual(self.names("red"), ["Red pen"])
+        self.assertEqual(suggest.index.built_at, built_at)
+
+    def test_reservations_keep_index(self):
+        self.names("blue")
+        built_at = suggest.index.built_at
+
+        with self.captureOnCommitCallbacks(execute=True):
+            StockItem.objects.reserve({self.item.pk: 2})
+            StockItem.objects.release({self.item.pk: 2})
+
+        self.names("blue")
+        self.assertEqual(suggest.index.built_at, built_at)
+
+    @override_settings(SUGGEST_INDEX_MAX_AGE=60)
+    def test_rebuilds_once_too_old(self):
+        self.names("blue")
+        # A rename in another worker whose cache this one doesn't share.
+        StockItem.objects.filter(pk=self.item.pk).update(name="Red pen")
+        self.assertEqual(self.names("red"), [])
+
+        suggest.index.built_at -= 61
+
+        self.assertEqual(self.names("red"), ["Red pen"])
+
+
+class SnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = StockCategory.objects.create(name="Stationery")
+        cls.item = StockItem.objects.create(
+            category=category, name="Pen", quantity=10, original_price=1
+        )
+
+    def snapshot(self):
+        out, err = StringIO(), StringIO()
+        call_command("snapshot_stock", stdout=out, stderr=err)
+        return self.item.snapshots.latest("taken_at"), err.getvalue()
+
+    def test_counts_movements_committed_after_snapshot(self):
+        snapshot, _ = self.snapshot()
+
+        # A receipt timestamped before the snapshot, in a transaction that
+        # only committed after it.
+        StockItem.objects.filter(pk=self.item.pk).update(quantity=F("quantity") + 5)
+        StockMovement.objects.create(
+            item=self.item,
+            kind=StockMovement.RECEIPT,
+            quantity_delta=5,
+            created_at=snapshot.taken_at - timedelta(seconds=1),
+        )
+
+        self.assertEqual(self.item.stock_at(timezone.now()), (15, 0))
+        _, drift = self.snapshot()
+        self.assertEqual(drift, "")
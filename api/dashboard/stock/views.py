@@ -1,19 +1,215 @@
+from django.db.models import Count, Prefetch, Q
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import viewsets
+from rest_framework import filters, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
 
-from .models import StockCategory, StockItem
+from home.globals.mixins import (
+    CacheResponseMixin,
+    ConditionalGetMixin,
+    SparseFieldsetMixin,
+)
+from home.globals.pagination import KeysetPagination
+from home.globals.serializers import get_query_list
+
+from . import search, suggest
+from .filters import StockItemFilter
+from .models import StockCategory, StockItem, StockItemImage, StockReservationStripe
 from .serializers import StockCategorySerializer, StockItemSerializer
 
 
-class StockCategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class StockCategoryViewSet(
+    CacheResponseMixin,
+    SparseFieldsetMixin,
+    ConditionalGetMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     queryset = StockCategory.objects.all()
     serializer_class = StockCategorySerializer
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ["is_active"]
 
 
-class StockItemViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = StockItem.objects.all()
+class StockItemViewSet(
+    CacheResponseMixin,
+    SparseFieldsetMixin,
+    ConditionalGetMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
+    queryset = StockItem.objects.with_stock_fields()
     serializer_class = StockItemSerializer
-    filter_backends = [DjangoFilterBackend]
-    filterset_fields = ["is_active", "category"]
\ No newline at end of file
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_class = StockItemFilter
+    cache_models = [StockItem, StockCategory, StockItemImage]
+    field_prefetches = {
+        "images": Prefetch(
+            "other_images",
+            queryset=StockItemImage.objects.filter(is_active=True).order_by("pk"),
+            to_attr="active_images",
+        )
+    }
+    # Most ids accepted by a single bulk lookup.
+    bulk_max_ids = 100
+    # Upper bounds of the price facet buckets; the last bucket is open-ended.
+    facet_price_bounds = [100, 500, 1000, 2500]
+    ordering_fields = [
+        "name",
+        "display_order",
+        "created_at",
+        "current_price",
+        "discount_percentage",
+        "available_quantity",
+    ]
+
+    def get_conditional_querysets(self, queryset):
+        # Reservations taken on stripes change the available quantity of an
+        # item without touching its row.
+        return [
+            queryset,
+            StockReservationStripe.objects.filter(item__in=queryset.values("pk")),
+        ]
+
+    @action(detail=False)
+    def facets(self, request):
+        """
+        Counts per category, availability, featured flag and price bucket for
+        the items matching the list filters, computed in one grouped query.
+        """
+        return self.get_cached_response(request, self._facets)
+
+    def _facets(self, request):
+        bounds = self.facet_price_bounds
+        buckets = list(zip([None, *bounds], [*bounds, None]))
+
+        price_counts = {}
+        for index, (low, high) in enumerate(buckets):
+            condition = Q()
+            if low is not None:
+                condition &= Q(current_price__gte=low)
+            if high is not None:
+                condition &= Q(current_price__lt=high)
+            price_counts[f"price_{index}"] = Count("pk", filter=condition)
+
+        rows = (
+            self.filter_queryset(self.get_queryset())
+            .order_by()
+            .values("category_id", "category__name")
+            .annotate(
+                total=Count("pk"),
+                in_stock=Count("pk", filter=Q(is_in_stock=True)),
+                featured=Count("pk", filter=Q(is_featured=True)),
+                **price_counts,
+            )
+            .order_by("category__name")
+        )
+
+        total = sum(row["total"] for row in rows)
+        in_stock = sum(row["in_stock"] for row in rows)
+        return Response(
+            {
+                "count": total,
+                "categories": [
+                    {
+                        "id": row["category_id"],
+                        "name": row["category__name"],
+                        "count": row["total"],
+                    }
+                    for row in rows
+                ],
+                "availability": {
+                    "in_stock": in_stock,
+                    "out_of_stock": total - in_stock,
+                },
+                "featured": sum(row["featured"] for row in rows),
+                "price": [
+                    {
+                        "min": low,
+                        "max": high,
+                        "count": sum(row[f"price_{index}"] for row in rows),
+                    }
+                    for index, (low, high) in enumerate(buckets)
+                ],
+            }
+        )
+
+    @action(detail=False, methods=["get", "post"])
+    def bulk(self, request):
+        """
+        Items for a list of ids, fetched in one query and returned in the
+        requested order, e.g. to render a cart or wishlist.
+
+        Pass ``?ids=3,1,2`` or POST ``{"ids": [3, 1, 2]}``. Ids without a
+        matching item are listed under ``missing``. Stock levels and prices
+        are always live, so responses are never cached.
+        """
+        if request.method == "POST":
+            ids = request.data.get("ids") if isinstance(request.data, dict) else None
+        else:
+            ids = get_query_list(request, "ids")
+
+        if not isinstance(ids, list):
+            raise ValidationError({"ids": "Expected a list of item ids."})
+        try:
+            ids = list(dict.fromkeys(int(pk) for pk in ids))
+        except (TypeError, ValueError):
+            raise ValidationError({"ids": "Item ids must be integers."})
+        if len(ids) > self.bulk_max_ids:
+            raise ValidationError(
+                {"ids": f"At most {self.bulk_max_ids} ids can be looked up at once."}
+            )
+
+        items = self.filter_queryset(self.get_queryset()).in_bulk(ids)
+        serializer = self.get_serializer(
+            [items[pk] for pk in ids if pk in items], many=True
+        )
+        return Response(
+            {
+                "results": serializer.data,
+                "missing": [pk for pk in ids if pk not in items],
+            }
+        )
+
+    @action(detail=False)
+    def suggest(self, request):
+        """
+        Typeahead suggestions for item and category names, answered from the
+        worker's in-memory prefix index.
+
+        Query parameters: ``q`` (the text typed so far) and ``limit``
+        (default 8, at most 20).
+        """
+        query = request.query_params.get("q", "")
+        try:
+            limit = min(max(int(request.query_params.get("limit", 8)), 1), 20)
+        except ValueError:
+            limit = 8
+        return Response(
+            {"query": query, "results": suggest.suggest(query, limit=limit)}
+        )
+
+    @action(detail=False)
+    def search(self, request):
+        """
+        Ranked full-text search over item name, description and category.
+
+        Query parameters: ``q`` (the search text) and ``limit`` (default 20,
+        at most 100). The list filters, such as ``is_active``, also apply.
+        """
+        return self.get_cached_response(request, self._search)
+
+    def _search(self, request):
+        query = request.query_params.get("q", "")
+        try:
+            limit = min(max(int(request.query_params.get("limit", 20)), 1), 100)
+        except ValueError:
+            limit = 20
+
+        queryset = self.filter_queryset(self.get_queryset())
+        items = search.search_stock_items(queryset, query, limit=limit)
+        serializer = self.get_serializer(items, many=True)
+        return Response(
+            {"query": query, "count": len(items), "results": serializer.data}
+        )
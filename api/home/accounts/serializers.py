@@ -1,5 +1,7 @@
 from rest_framework import serializers
 
+from home.globals.serializers import FastHyperlinkedModelSerializer
+
 from .models import Group, User
 
 
@@ -12,7 +14,7 @@ class GroupSerializer(serializers.ModelSerializer):
         ]
 
 
-class UserSerializer(serializers.HyperlinkedModelSerializer):
+class UserSerializer(FastHyperlinkedModelSerializer):
     groups = GroupSerializer(many=True)
 
     class Meta:
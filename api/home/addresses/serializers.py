@@ -1,15 +1,15 @@
-from rest_framework.serializers import HyperlinkedModelSerializer
+from home.globals.serializers import FastHyperlinkedModelSerializer
 
 from .models import EmailAddress, PhoneAddress, PhysicalAddress, SocialMediaAddress
 
 
-class EmailAddressSerializer(HyperlinkedModelSerializer):
+class EmailAddressSerializer(FastHyperlinkedModelSerializer):
     class Meta:
         model = EmailAddress
         fields = ["url", "email", "is_primary", "mailto_link"]
 
 
-class PhoneAddressSerializer(HyperlinkedModelSerializer):
+class PhoneAddressSerializer(FastHyperlinkedModelSerializer):
     class Meta:
         model = PhoneAddress
         fields = [
@@ -33,7 +33,7 @@ class PhoneAddressSerializer(HyperlinkedModelSerializer):
         return data
 
 
-class PhysicalAddressSerializer(HyperlinkedModelSerializer):
+class PhysicalAddressSerializer(FastHyperlinkedModelSerializer):
     class Meta:
         model = PhysicalAddress
         fields = [
@@ -54,7 +54,7 @@ class PhysicalAddressSerializer(HyperlinkedModelSerializer):
         ]
 
 
-class SocialMediaAddressSerializer(HyperlinkedModelSerializer):
+class SocialMediaAddressSerializer(FastHyperlinkedModelSerializer):
     class Meta:
         model = SocialMediaAddress
         fields = [
@@ -12,6 +12,8 @@ from django.views.decorators.csrf import csrf_exempt
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
+from home.globals.mixins import CacheResponseMixin, ConditionalGetMixin
+
 from .forms import EmailUsForm
 from .models import EmailAddress, PhoneAddress, PhysicalAddress, SocialMediaAddress
 from .serializers import (
@@ -127,28 +129,36 @@ class EmailUsView(View):
             )
 
 
-class EmailAddressViewSet(ReadOnlyModelViewSet):
+class EmailAddressViewSet(
+    CacheResponseMixin, ConditionalGetMixin, ReadOnlyModelViewSet
+):
     queryset = EmailAddress.objects.all()
     serializer_class = EmailAddressSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ["is_primary"]
 
 
-class PhoneAddressViewSet(ReadOnlyModelViewSet):
+class PhoneAddressViewSet(
+    CacheResponseMixin, ConditionalGetMixin, ReadOnlyModelViewSet
+):
     queryset = PhoneAddress.objects.all()
     serializer_class = PhoneAddressSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ["is_primary", "use_for_whatsapp", "is_active"]
 
 
-class PhysicalAddressViewSet(ReadOnlyModelViewSet):
+class PhysicalAddressViewSet(
+    CacheResponseMixin, ConditionalGetMixin, ReadOnlyModelViewSet
+):
     queryset = PhysicalAddress.objects.all()
     serializer_class = PhysicalAddressSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ["use_in_contact_form", "is_active"]
 
 
-class SocialMediaAddressViewSet(ReadOnlyModelViewSet):
+class SocialMediaAddressViewSet(
+    CacheResponseMixin, ConditionalGetMixin, ReadOnlyModelViewSet
+):
     queryset = SocialMediaAddress.objects.all()
     serializer_class = SocialMediaAddressSerializer
     filter_backends = [DjangoFilterBackend]
@@ -0,0 +1,64 @@
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY = "model-version:{label}"
+NAMED_VERSION_KEY = "version:{name}"
+
+
+def _version_key(model):
+    return VERSION_KEY.format(label=model._meta.label_lower)
+
+
+def _initial_version():
+    # Seed from the clock rather than 1 so that a version key evicted from
+    # the cache never comes back with a number it has already used.
+    return int(time.time() * 1000)
+
+
+def _get_versions(keys):
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _initial_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), timeout=None)
+
+
+def get_model_versions(models):
+    """Return the current cache version of each model, in order."""
+    return _get_versions([_version_key(model) for model in models])
+
+
+def get_model_version(model):
+    return get_model_versions([model])[0]
+
+
+def bump_model_version(model):
+    """
+    Invalidate every cache entry keyed on this model's version.
+
+    Called once committed by the save/delete receivers in
+    ``home.globals.signals``; code that writes with ``QuerySet.update()`` or
+    ``bulk_create()`` bypasses those and must call this itself, on commit.
+    """
+    _bump_version(_version_key(model))
+
+
+def get_version(name):
+    """
+    Return the current value of a named version: one that its owner bumps
+    for a narrower set of changes than every write to a model.
+    """
+    return _get_versions([NAMED_VERSION_KEY.format(name=name)])[0]
+
+
+def bump_version(name):
+    _bump_version(NAMED_VERSION_KEY.format(name=name))
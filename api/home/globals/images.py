@@ -0,0 +1,225 @@
+"""
+Derivative renditions of ``AbstractImage`` uploads.
+
+Every original gets a square thumbnail and WebP copies at a few widths, stored
+next to it under ``derivatives/`` with predictable names:
+
+    images/pen.jpg -> images/derivatives/pen-thumb.webp
+                      images/derivatives/pen-320w.webp ...
+
+Rendering runs in a process pool once the upload is committed, so requests
+never wait on Pillow. Once the set is complete, the width of every rendition
+is recorded on the rows that use the original (``image_derivatives``); until
+then, URLs fall back to the original. Serializing an image never has to ask
+the storage whether its renditions exist.
+
+``placeholder()`` is the exception: its micro-thumbnail and dominant colour are
+stored on the row itself, so it runs while the upload is being saved.
+"""
+
+import logging
+import multiprocessing
+import posixpath
+from base64 import b64encode
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from threading import Lock
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models.functions import Now
+from PIL import Image, ImageOps
+
+from .cache import bump_model_version
+from .storage import get_image_storage
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL = "thumb"
+THUMBNAIL_SIZE = 160
+WIDTHS = [320, 640, 1280]
+WEBP_QUALITY = 80
+PLACEHOLDER_SIZE = 16
+PLACEHOLDER_QUALITY = 40
+
+_executor = None
+_executor_lock = Lock()
+
+
+def derivative_name(name, label):
+    """Return the storage name of the ``label`` rendition of ``name``."""
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, "derivatives", f"{stem}-{label}.webp")
+
+
+def width_label(width):
+    return f"{width}w"
+
+
+def labels():
+    """Rendition labels in the order they are written, thumbnail last."""
+    return [width_label(width) for width in WIDTHS] + [THUMBNAIL]
+
+
+def has_derivatives(name, storage=None):
+    storage = storage or get_image_storage()
+    return storage.exists(derivative_name(name, THUMBNAIL))
+
+
+def _encode(image):
+    buffer = BytesIO()
+    image.save(buffer, "WEBP", quality=WEBP_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+def render(data):
+    """
+    Return ``{label: (webp bytes, width)}`` for the bytes of an original
+    image, ``width`` being the actual width of the rendition.
+    """
+    with Image.open(BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            has_alpha = image.mode in ("LA", "PA") or "transparency" in image.info
+            image = image.convert("RGBA" if has_alpha else "RGB")
+
+        renditions = {}
+        for width in WIDTHS:
+            # Never upscale: small originals are re-encoded at their own size.
+            rendition = image.copy()
+            rendition.thumbnail((width, width * 10), Image.Resampling.LANCZOS)
+            renditions[width_label(width)] = (_encode(rendition), rendition.width)
+
+        thumbnail = ImageOps.fit(
+            image, (THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.Resampling.LANCZOS
+        )
+        renditions[THUMBNAIL] = (_encode(thumbnail), thumbnail.width)
+        return renditions
+
+
+def stored_widths(name, storage=None):
+    """Return ``{label: width}`` read from the stored renditions of ``name``."""
+    storage = storage or get_image_storage()
+    widths = {}
+    for label in labels():
+        with storage.open(derivative_name(name, label), "rb") as file:
+            with Image.open(file) as rendition:
+                widths[label] = rendition.width
+    return widths
+
+
+def image_models():
+    from .models import AbstractImage
+
+    return [model for model in apps.get_models() if issubclass(model, AbstractImage)]
+
+
+def record(name, widths):
+    """Record the rendition widths on every row whose image is ``name``."""
+    for model in image_models():
+        changes = {"image_derivatives": widths}
+        if any(field.name == "updated_at" for field in model._meta.concrete_fields):
+            changes["updated_at"] = Now()
+        model._default_manager.filter(image=name).update(**changes)
+
+
+def invalidate():
+    """
+    Invalidate the cached responses embedding image URLs. Called by the
+    process that queued the rendering, as the workers may not share its cache.
+    """
+    for model in image_models():
+        bump_model_version(model)
+
+
+def placeholder(file):
+    """
+    Return ``(data_uri, hex_colour)`` for an image file: a WebP thumbnail a
+    few pixels across, meant to be scaled up and blurred while the real image
+    loads, and the image's most common colour. Empty strings if the file can't
+    be read as an image.
+    """
+    try:
+        file.seek(0)
+        with Image.open(file) as original:
+            # JPEGs can be decoded at a fraction of their size, which keeps
+            # this cheap enough to run while saving an upload.
+            original.draft("RGB", (PLACEHOLDER_SIZE * 8, PLACEHOLDER_SIZE * 8))
+            image = ImageOps.exif_transpose(original).convert("RGB")
+            image.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE), Image.Resampling.BOX)
+        file.seek(0)
+    except (OSError, ValueError):
+        return "", ""
+
+    buffer = BytesIO()
+    image.save(buffer, "WEBP", quality=PLACEHOLDER_QUALITY)
+    data_uri = "data:image/webp;base64," + b64encode(buffer.getvalue()).decode()
+
+    palette = image.quantize(colors=4)
+    _, index = max(palette.getcolors())
+    red, green, blue = palette.getpalette()[index * 3 : index * 3 + 3]
+    return data_uri, f"#{red:02x}{green:02x}{blue:02x}"
+
+
+def generate(name, storage=None, force=False):
+    """
+    Render and store every rendition of ``name``, then record their widths
+    on the rows using it. Existing renditions are kept - with content-addressed
+    names they can only be identical - unless ``force`` is set.
+    """
+    storage = storage or get_image_storage()
+    if not force and has_derivatives(name, storage):
+        record(name, stored_widths(name, storage))
+        return name
+    with storage.open(name, "rb") as original:
+        renditions = render(original.read())
+
+    for label in labels():
+        path = derivative_name(name, label)
+        if storage.exists(path):
+            storage.delete(path)
+        storage.save(path, ContentFile(renditions[label][0]))
+    record(name, {label: width for label, (_, width) in renditions.items()})
+    return name
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Spawned rather than forked: jobs are queued from requests, and a
+            # forked worker would share the request's database connection.
+            _executor = ProcessPoolExecutor(
+                max_workers=getattr(settings, "IMAGE_DERIVATIVE_WORKERS", 2),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=django.setup,
+            )
+        return _executor
+
+
+def _finished(future):
+    if future.cancelled():
+        return
+    if future.exception() is not None:
+        logger.error("Error generating image derivatives", exc_info=future.exception())
+    else:
+        invalidate()
+
+
+def schedule(name):
+    """Queue ``name`` for rendering in the worker pool."""
+    global _executor
+    try:
+        future = get_executor().submit(generate, name)
+    except RuntimeError as e:
+        # Raised by a broken pool (e.g. a worker was killed) or at shutdown;
+        # drop the pool so that the next upload starts a fresh one.
+        with _executor_lock:
+            _executor = None
+        logger.error(f"Error scheduling image derivatives: {e}")
+        return None
+    future.add_done_callback(_finished)
+    return future
@@ -79,6 +79,14 @@ ALLOWED_HOSTS="localhost,127.0.0.1"
 # DB_HOST="localhost"
 # DB_PORT="5432"
 
+# 🗃️ Cache Configuration
+# CACHE_BACKEND="django.core.cache.backends.filebased.FileBasedCache"
+# CACHE_LOCATION="/var/tmp/djanx_cache"
+# API_CACHE_TIMEOUT="300"
+
+# 🖼️ Media Configuration
+# IMAGE_DERIVATIVE_WORKERS="2"
+
 # 📧 Email Configuration
 # EMAIL_BACKEND="django.core.mail.backends.console.EmailBackend"
 # EMAIL_HOST=""
@@ -0,0 +1,48 @@
+from concurrent.futures import as_completed
+
+from django.core.management.base import BaseCommand
+
+from home.globals import images
+
+
+class Command(BaseCommand):
+    help = "Generate thumbnails and WebP renditions for uploaded images"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerate renditions that already exist",
+        )
+
+    def handle(self, *args, **options):
+        names = set()
+        for model in images.image_models():
+            rows = model._default_manager.exclude(image="").exclude(image__isnull=True)
+            if not options["force"]:
+                rows = rows.filter(image_derivatives={})
+            names.update(rows.values_list("image", flat=True))
+
+        if not names:
+            self.stdout.write(
+                self.style.SUCCESS("All image renditions are up to date.")
+            )
+            return
+
+        executor = images.get_executor()
+        futures = {
+            executor.submit(images.generate, name, force=options["force"]): name
+            for name in names
+        }
+        failed = 0
+        for future in as_completed(futures):
+            if future.exception() is not None:
+                failed += 1
+                self.stderr.write(f"{futures[future]}: {future.exception()}")
+        images.invalidate()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated renditions for {len(names) - failed} of {len(names)} images."
+            )
+        )
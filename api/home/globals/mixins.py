@@ -1,3 +1,18 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework.relations import HyperlinkedIdentityField
+from rest_framework.response import Response
+
+from .cache import get_model_versions
+from .serializers import get_query_list
+
+
 class UniqueChoiceFormMixin:
     """
     Mixin for forms that restricts the 'name' field choices to those not
@@ -24,3 +39,241 @@ class UniqueChoiceFormMixin:
         ]
 
         self.fields["name"].choices = [(None, "")] + available_choices
+
+
+class ConditionalGetMixin:
+    """
+    Mixin for read-only viewsets that answers conditional GETs with
+    ``304 Not Modified`` before anything is serialized.
+
+    The validator is ``Max(updated_at)`` plus the row count of the filtered
+    queryset (a single row for detail views), fetched with one aggregate
+    query. The count catches deletions, which leave no newer timestamp
+    behind. Viewsets whose model has no ``conditional_field`` are served
+    unconditionally.
+    """
+
+    conditional_field = "updated_at"
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.get_conditional_response(
+            request, queryset, super().list, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        return self.get_conditional_response(
+            request, queryset, super().retrieve, *args, **kwargs
+        )
+
+    def get_conditional_querysets(self, queryset):
+        """
+        Return the querysets whose contents the response depends on. Override
+        to add related models that are embedded in the representation.
+        """
+        return [queryset]
+
+    def get_conditional_validators(self, queryset):
+        """Return ``(etag, last_modified)`` for the given queryset."""
+        parts = [self.request.get_full_path(), self.request.accepted_renderer.format]
+        last_modified = None
+
+        for qs in self.get_conditional_querysets(queryset):
+            aggregates = qs.order_by().aggregate(
+                last_modified=Max(self.conditional_field), count=Count("pk")
+            )
+            newest = aggregates["last_modified"]
+            parts += [qs.model._meta.label, aggregates["count"], newest]
+            if newest and (last_modified is None or newest > last_modified):
+                last_modified = newest
+
+        etag = hashlib.md5(
+            "|".join(map(str, parts)).encode(), usedforsecurity=False
+        ).hexdigest()
+        return quote_etag(etag), last_modified and int(last_modified.timestamp())
+
+    def get_conditional_response(self, request, queryset, handler, *args, **kwargs):
+        model_fields = {field.name for field in queryset.model._meta.get_fields()}
+        if self.conditional_field not in model_fields:
+            return handler(request, *args, **kwargs)
+
+        etag, last_modified = self.get_conditional_validators(queryset)
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return not_modified
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response.setdefault("ETag", etag)
+            if last_modified:
+                response.setdefault("Last-Modified", http_date(last_modified))
+        return response
+
+
+class CacheResponseMixin:
+    """
+    Mixin for read-only viewsets that caches rendered JSON responses.
+
+    Keys combine the absolute request URL with the cache version of every
+    model in ``cache_models`` (the queryset's model by default). Versions are
+    bumped by the ``post_save``/``post_delete``/``m2m_changed`` receivers in
+    ``home.globals.signals``, so a write makes every dependent entry
+    unreachable without having to enumerate it.
+
+    Combine with ``ConditionalGetMixin`` (listed after this mixin) to also
+    answer conditional requests from the cached validators.
+    """
+
+    cache_models = None
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(request, super().retrieve, *args, **kwargs)
+
+    def get_cache_models(self):
+        return self.cache_models or [self.queryset.model]
+
+    def get_cache_key(self, request):
+        versions = get_model_versions(self.get_cache_models())
+        raw = "|".join(map(str, [request.build_absolute_uri(), *versions]))
+        return (
+            "api-response:"
+            + hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+        )
+
+    def get_cached_response(self, request, handler, *args, **kwargs):
+        # The browsable API embeds per-user markup, so only JSON is cached.
+        if request.accepted_renderer.format != "json":
+            return handler(request, *args, **kwargs)
+
+        cache_key = self.get_cache_key(request)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            content, content_type, headers = cached
+            not_modified = get_conditional_response(
+                request,
+                etag=headers.get("ETag"),
+                last_modified=parse_http_date_safe(headers.get("Last-Modified")),
+            )
+            if not_modified is not None:
+                return not_modified
+
+            response = HttpResponse(content, content_type=content_type)
+            for header, value in headers.items():
+                response[header] = value
+            return response
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200 and isinstance(response, Response):
+            timeout = getattr(settings, "API_CACHE_TIMEOUT", 300)
+
+            def store(rendered):
+                headers = {
+                    header: rendered[header]
+                    for header in ("ETag", "Last-Modified")
+                    if rendered.has_header(header)
+                }
+                cache.set(
+                    cache_key,
+                    (rendered.content, rendered["Content-Type"], headers),
+                    timeout,
+                )
+
+            response.add_post_render_callback(store)
+        return response
+
+
+class SparseFieldsetMixin:
+    """
+    Mixin for viewsets whose serializer uses ``DynamicFieldsMixin``.
+
+    Narrows the queryset with ``.only()`` to the columns behind the fields
+    that will actually be emitted, and joins the relations named in
+    ``?expand=`` with ``select_related`` so they cost no extra queries. The
+    primary key and ordering columns are always loaded. If a field reads
+    something the mixin can't trace back to a column, the queryset is left
+    unnarrowed rather than risk a query per row for a deferred field.
+
+    ``field_prefetches`` maps serializer field names to the lookups (or
+    ``Prefetch`` objects) to prefetch when those fields are emitted.
+    """
+
+    field_prefetches = {}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer = self.get_serializer()
+
+        prefetches = [
+            prefetch
+            for name, prefetch in self.field_prefetches.items()
+            if name in serializer.fields
+        ]
+        if prefetches:
+            queryset = queryset.prefetch_related(*prefetches)
+
+        expand = [
+            name
+            for name in get_query_list(self.request, "expand")
+            if name in getattr(serializer, "expandable_fields", {})
+            and name in serializer.fields
+        ]
+        if expand:
+            queryset = queryset.select_related(*expand)
+
+        only = self.get_only_fields(queryset, serializer)
+        if only is not None:
+            queryset = queryset.only(*only)
+        return queryset
+
+    def get_only_fields(self, queryset, serializer):
+        """Return the model fields to load, or None to load every field."""
+        opts = queryset.model._meta
+        concrete_fields = {field.name for field in opts.concrete_fields}
+        dependencies = getattr(serializer, "field_dependencies", {})
+
+        only = {opts.pk.name}
+        ordering = [*opts.ordering, *get_query_list(self.request, "ordering")]
+        only.update(
+            name
+            for name in (field.lstrip("-") for field in ordering)
+            if name in concrete_fields
+        )
+
+        for name, field in serializer.fields.items():
+            if name in dependencies:
+                only.update(dependencies[name])
+            elif field.source in queryset.query.annotations:
+                continue
+            elif isinstance(field, HyperlinkedIdentityField):
+                lookup_field = field.lookup_field
+                only.add(opts.pk.name if lookup_field == "pk" else lookup_field)
+            elif field.source_attrs and field.source_attrs[0] in concrete_fields:
+                only.add(field.source_attrs[0])
+            else:
+                return None
+        return only
+
+    def get_conditional_querysets(self, queryset):
+        """Also validate against the rows of expanded relations."""
+        querysets = super().get_conditional_querysets(queryset)
+        serializer = self.get_serializer()
+        for name in get_query_list(self.request, "expand"):
+            if name not in getattr(serializer, "expandable_fields", {}):
+                continue
+            related_model = queryset.model._meta.get_field(name).related_model
+            related_fields = {field.name for field in related_model._meta.get_fields()}
+            if self.conditional_field not in related_fields:
+                continue
+            querysets.append(
+                related_model._default_manager.filter(pk__in=queryset.values(name))
+            )
+        return querysets
@@ -1,6 +1,11 @@
-from django.db import models
+from functools import partial
+
+from django.db import models, transaction
 from django.templatetags.static import static
 
+from . import images
+from .storage import get_image_storage
+
 
 class AbstractDisplayOrder(models.Model):
     display_order = models.PositiveIntegerField(
@@ -43,13 +48,39 @@ class AbstractImage(models.Model):
 
     image = models.ImageField(
         upload_to="images/",
+        storage=get_image_storage,
         blank=True,
         null=True,
+        width_field="image_width",
+        height_field="image_height",
         help_text="Optional Image.",
     )
     image_alt_text = models.CharField(
         max_length=255, blank=True, help_text="Alternative text for accessibility."
     )
+    image_width = models.PositiveIntegerField(
+        null=True, blank=True, editable=False, help_text="Image width in pixels."
+    )
+    image_height = models.PositiveIntegerField(
+        null=True, blank=True, editable=False, help_text="Image height in pixels."
+    )
+    image_placeholder = models.TextField(
+        blank=True,
+        editable=False,
+        help_text="Tiny blurred preview of the image as a data URI.",
+    )
+    image_color = models.CharField(
+        max_length=7,
+        blank=True,
+        editable=False,
+        help_text="Dominant colour of the image as a hex code.",
+    )
+    image_derivatives = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Width in pixels of each generated rendition, by label.",
+    )
 
     @property
     def image_url(self):
@@ -57,3 +88,62 @@ class AbstractImage(models.Model):
         if self.image:
             return self.image.url
         return static("globals/img/default.png")
+
+    @property
+    def has_image_derivatives(self):
+        """Whether the thumbnail and WebP renditions have been generated."""
+        return bool(self.image) and bool(self.image_derivatives)
+
+    def get_derivative_url(self, label):
+        """URL of a rendition, or of the original while it is pending."""
+        if not self.has_image_derivatives:
+            return self.image_url
+        return self.image.storage.url(images.derivative_name(self.image.name, label))
+
+    @property
+    def image_urls(self):
+        """URLs of the original and every rendition, keyed by label."""
+        urls = {"original": self.image_url}
+        for label in images.labels():
+            urls[label] = self.get_derivative_url(label)
+        return urls
+
+    @property
+    def srcset(self):
+        """``srcset`` attribute value for the WebP renditions, if generated."""
+        if not self.has_image_derivatives:
+            return ""
+        # Originals are never upscaled, so renditions of a small one can share
+        # a width; the narrowest of them stands for it.
+        candidates = {}
+        for label in map(images.width_label, images.WIDTHS):
+            width = self.image_derivatives.get(label)
+            if width and width not in candidates:
+                candidates[width] = self.get_derivative_url(label)
+        return ", ".join(f"{url} {width}w" for width, url in candidates.items())
+
+    def save(self, *args, **kwargs):
+        # A fresh upload is only written to storage during save().
+        uploaded = bool(self.image) and not self.image._committed
+        if uploaded:
+            self.image_placeholder, self.image_color = images.placeholder(self.image)
+        elif not self.image:
+            self.image_placeholder, self.image_color = "", ""
+
+        if uploaded or not self.image:
+            self.image_derivatives = {}
+        elif not self._state.adding and kwargs.get("update_fields") is None:
+            # The renditions are recorded by the workers; a copy of the row
+            # loaded before that mustn't overwrite them.
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "image_derivatives"
+            ]
+        super().save(*args, **kwargs)
+
+        if uploaded:
+            transaction.on_commit(
+                partial(images.schedule, self.image.name),
+                using=kwargs.get("using") or self._state.db,
+            )
@@ -0,0 +1,125 @@
+from django.urls import NoReverseMatch
+from rest_framework import serializers
+
+# Stands in for the lookup value when resolving a URL template. Digits only,
+# so that it also satisfies ``int`` path converters.
+URL_TEMPLATE_SENTINEL = 7390216584093
+
+
+def get_query_list(request, param):
+    """Return the comma-separated values of a query parameter as a list."""
+    if request is None:
+        return []
+    value = request.query_params.get(param, "")
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin that honours the ``?fields=``, ``?omit=`` and
+    ``?expand=`` query parameters on the top-level serializer.
+
+    - ``fields``: only emit the listed fields.
+    - ``omit``: drop the listed fields.
+    - ``expand``: replace a related field's default representation (usually
+      a hyperlink) with the serializer given in ``expandable_fields``.
+
+    ``field_dependencies`` lists the model fields behind fields that are not
+    model fields themselves (e.g. properties), so views can narrow their
+    queryset with ``.only()`` to what the response needs.
+    """
+
+    expandable_fields = {}
+    field_dependencies = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+
+        # Nested serializers keep their full representation.
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if parent is not None:
+            return fields
+
+        request = self.context.get("request")
+
+        for name in get_query_list(request, "expand"):
+            if name in self.expandable_fields and name in fields:
+                fields[name] = self.expandable_fields[name](read_only=True)
+
+        only = get_query_list(request, "fields")
+        if only:
+            fields = {name: field for name, field in fields.items() if name in only}
+
+        for name in get_query_list(request, "omit"):
+            fields.pop(name, None)
+
+        return fields
+
+
+class FastHyperlinkMixin:
+    """
+    Mixin for hyperlinked fields that resolves the URL once per request and
+    view name, with a sentinel standing in for the lookup value, and then
+    formats each integer key into the resulting template instead of calling
+    ``reverse()`` for every object.
+
+    Anything the template can't reproduce exactly - non-integer lookup values
+    and versioned APIs - goes through DRF's regular ``get_url``.
+    """
+
+    def get_url(self, obj, view_name, request, format):
+        if hasattr(obj, "pk") and obj.pk in (None, ""):
+            return None
+
+        lookup_value = getattr(obj, self.lookup_field)
+        template = self.get_url_template(view_name, request, format)
+        if template is None or type(lookup_value) is not int:
+            return super().get_url(obj, view_name, request, format)
+
+        prefix, suffix = template
+        return f"{prefix}{lookup_value}{suffix}"
+
+    def get_url_template(self, view_name, request, format):
+        """Return ``(prefix, suffix)`` around the lookup value, or None."""
+        cached = getattr(self, "_url_template", None)
+        if cached and cached[0] is request and cached[1] == (view_name, format):
+            return cached[2]
+
+        template = None
+        if getattr(request, "versioning_scheme", None) is None:
+            sentinel = str(URL_TEMPLATE_SENTINEL)
+            try:
+                url = self.reverse(
+                    view_name,
+                    kwargs={self.lookup_url_kwarg: URL_TEMPLATE_SENTINEL},
+                    request=request,
+                    format=format,
+                )
+            except NoReverseMatch:
+                url = ""
+            if url.count(sentinel) == 1:
+                template = tuple(url.split(sentinel))
+
+        self._url_template = (request, (view_name, format), template)
+        return template
+
+
+class FastHyperlinkedRelatedField(
+    FastHyperlinkMixin, serializers.HyperlinkedRelatedField
+):
+    pass
+
+
+class FastHyperlinkedIdentityField(
+    FastHyperlinkMixin, serializers.HyperlinkedIdentityField
+):
+    pass
+
+
+class FastHyperlinkedModelSerializer(serializers.HyperlinkedModelSerializer):
+    """``HyperlinkedModelSerializer`` whose generated links use the fast fields."""
+
+    serializer_related_field = FastHyperlinkedRelatedField
+    serializer_url_field = FastHyperlinkedIdentityField
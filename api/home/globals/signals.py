@@ -0,0 +1,30 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump_model_version
+
+
+def bump_on_commit(*models, using=None):
+    """
+    Bump the versions once the write is committed: bumped any earlier, a
+    concurrent request could cache what it reads before the commit under the
+    new version, where it would stay until the entry times out.
+    """
+    for model in dict.fromkeys(models):
+        transaction.on_commit(partial(bump_model_version, model), using=using)
+
+
+@receiver(post_save, dispatch_uid="globals_bump_version_on_save")
+@receiver(post_delete, dispatch_uid="globals_bump_version_on_delete")
+def bump_version_on_change(sender, using=None, **kwargs):
+    bump_on_commit(sender, using=using)
+
+
+@receiver(m2m_changed, dispatch_uid="globals_bump_version_on_m2m_change")
+def bump_version_on_m2m_change(sender, instance, action, model, using=None, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    bump_on_commit(sender, instance.__class__, model, using=using)
@@ -0,0 +1,66 @@
+import hashlib
+import posixpath
+import re
+
+from django.core.files.base import File
+from django.core.files.storage import FileSystemStorage, storages
+
+# A name component made of a SHA-256 digest, optionally followed by a
+# rendition suffix such as "-thumb" (see home.globals.images).
+CONTENT_ADDRESSED_NAME = re.compile(r"(^|/)[0-9a-f]{64}(-[\w-]+)?(\.\w+)?$")
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage that names files after the SHA-256 of their content,
+    fanned out by the first two hex digits:
+
+        images/pen.jpg -> images/3f/3fa9...c1.jpg
+
+    Identical uploads resolve to the same name and are stored once, and since
+    a name can never point at different bytes, its URL can be cached forever.
+    A file may be shared by several rows, so it must not be deleted along with
+    any one of them.
+
+    Names with a directory in ``verbatim_dirs`` are stored as given: these are
+    the renditions from ``home.globals.images``, which are named after their
+    original and so inherit its uniqueness.
+    """
+
+    verbatim_dirs = ("derivatives",)
+
+    def get_content_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+
+        directory, filename = posixpath.split(name)
+        extension = posixpath.splitext(filename)[1].lower()
+        hexdigest = digest.hexdigest()
+        return posixpath.join(directory, hexdigest[:2], hexdigest + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+
+        directories = posixpath.dirname(name).split("/")
+        if any(directory in self.verbatim_dirs for directory in directories):
+            return super().save(name, content, max_length=max_length)
+
+        name = self.get_content_name(name, content)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+
+def get_image_storage():
+    """Storage for ``AbstractImage`` uploads, configured in ``STORAGES``."""
+    return storages["images"]
+
+
+def is_content_addressed(name):
+    """Whether ``name`` looks like a content-addressed name or a rendition."""
+    return CONTENT_ADDRESSED_NAME.search(name) is not None
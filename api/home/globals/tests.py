@@ -0,0 +1,40 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase
+
+from home.lists.models import ListCategory
+
+from .cache import get_model_version
+
+
+class ModelVersionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_save_bumps_version_on_commit(self):
+        version = get_model_version(ListCategory)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ListCategory.objects.create(name="Category")
+            self.assertEqual(get_model_version(ListCategory), version)
+
+        self.assertGreater(get_model_version(ListCategory), version)
+
+    def test_rolled_back_save_keeps_version(self):
+        version = get_model_version(ListCategory)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                ListCategory.objects.create(name="Category")
+                transaction.set_rollback(True)
+
+        self.assertEqual(get_model_version(ListCategory), version)
+
+    def test_delete_bumps_version_on_commit(self):
+        category = ListCategory.objects.create(name="Category")
+        version = get_model_version(ListCategory)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            category.delete()
+
+        self.assertGreater(get_model_version(ListCategory), version)
@@ -0,0 +1,20 @@
+from django.utils.cache import patch_cache_control
+from django.views.static import serve
+
+from .storage import is_content_addressed
+
+# One year, the longest lifetime caches are asked to honour.
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+
+def serve_media(request, path, document_root=None, show_indexes=False):
+    """
+    Development media server that marks content-addressed files as immutable,
+    mirroring the headers the production web server should send.
+    """
+    response = serve(request, path, document_root, show_indexes)
+    if response.status_code == 200 and is_content_addressed(path):
+        patch_cache_control(
+            response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True
+        )
+    return response
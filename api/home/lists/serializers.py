@@ -1,9 +1,15 @@
 from rest_framework import serializers
 
+from home.globals.serializers import (
+    DynamicFieldsMixin,
+    FastHyperlinkedModelSerializer,
+    FastHyperlinkedRelatedField,
+)
+
 from .models import ListCategory, ListItem
 
 
-class ListCategorySerializer(serializers.ModelSerializer):
+class ListCategorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = ListCategory
         fields = [
@@ -12,8 +18,10 @@ class ListCategorySerializer(serializers.ModelSerializer):
         ]
 
 
-class ListItemSerializer(serializers.HyperlinkedModelSerializer):
-    category = serializers.HyperlinkedRelatedField(
+class ListItemSerializer(DynamicFieldsMixin, FastHyperlinkedModelSerializer):
+    expandable_fields = {"category": ListCategorySerializer}
+
+    category = FastHyperlinkedRelatedField(
         view_name="listcategory-detail", queryset=ListCategory.objects.all()
     )
 
@@ -0,0 +1,40 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from .models import ListCategory, ListItem
+
+
+class ListItemViewSetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = ListCategory.objects.create(name="Before")
+        ListItem.objects.create(category=cls.category, name="Item")
+
+    def setUp(self):
+        cache.clear()
+        self.client.defaults["HTTP_HOST"] = "localhost"
+
+    def get_category_names(self, **headers):
+        response = self.client.get("/lists/items/?expand=category", headers=headers)
+        return response, [item["category"]["name"] for item in response.json()]
+
+    def rename_category(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = "After"
+            self.category.save()
+
+    def test_expanded_category_rename_invalidates_cache(self):
+        self.assertEqual(self.get_category_names()[1], ["Before"])
+
+        self.rename_category()
+
+        self.assertEqual(self.get_category_names()[1], ["After"])
+
+    def test_expanded_category_rename_changes_etag(self):
+        response, _ = self.get_category_names()
+
+        self.rename_category()
+
+        response, names = self.get_category_names(if_none_match=response["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(names, ["After"])
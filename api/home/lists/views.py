@@ -1,17 +1,41 @@
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets
 
+from home.globals.mixins import (
+    CacheResponseMixin,
+    ConditionalGetMixin,
+    SparseFieldsetMixin,
+)
+
 from .models import ListCategory, ListItem
 from .serializers import ListCategorySerializer, ListItemSerializer
 
 
-class ListCategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class ListCategoryViewSet(
+    CacheResponseMixin,
+    SparseFieldsetMixin,
+    ConditionalGetMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     queryset = ListCategory.objects.all()
     serializer_class = ListCategorySerializer
 
 
-class ListItemViewSet(viewsets.ReadOnlyModelViewSet):
+class ListItemViewSet(
+    CacheResponseMixin,
+    SparseFieldsetMixin,
+    ConditionalGetMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     queryset = ListItem.objects.all()
     serializer_class = ListItemSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ["category"]
+    # ``?expand=category`` embeds the categories.
+    cache_models = [ListItem, ListCategory]
+
+    def get_conditional_querysets(self, queryset):
+        return [
+            queryset,
+            ListCategory.objects.filter(pk__in=queryset.values("category")),
+        ]
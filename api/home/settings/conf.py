@@ -134,6 +134,28 @@ DATABASES = {
 }
 
 
+# ------------------------------------------------------------------------------
+# 🗃️ Cache Configuration
+# https://docs.djangoproject.com/en/stable/topics/cache/
+# ------------------------------------------------------------------------------
+
+# Local memory is per process: when running several workers on one box, use
+# "django.core.cache.backends.filebased.FileBasedCache" with a directory as the
+# CACHE_LOCATION so that invalidations are shared between them.
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": config("CACHE_LOCATION", default="djanx"),
+    }
+}
+
+# Seconds a cached API response may be served; entries are also invalidated as
+# soon as one of their models changes.
+API_CACHE_TIMEOUT = config("API_CACHE_TIMEOUT", default=300, cast=int)
+
+
 # ------------------------------------------------------------------------------
 # 📧 Email Configuration
 # https://docs.djangoproject.com/en/stable/topics/email/
@@ -230,6 +252,19 @@ STATIC_ROOT = API_DIR / "static"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = API_DIR / "media"
 
+# Uploaded images are stored under the hash of their content (see
+# home.globals.storage), so their URLs never change meaning: serve MEDIA_URL
+# with "Cache-Control: public, max-age=31536000, immutable" in production.
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    "images": {"BACKEND": "home.globals.storage.ContentAddressedStorage"},
+}
+
+# Worker processes that render thumbnails and WebP variants of uploaded images
+# (see home.globals.images).
+IMAGE_DERIVATIVE_WORKERS = config("IMAGE_DERIVATIVE_WORKERS", default=2, cast=int)
+
 
 # ------------------------------------------------------------------------------
 # 🌐 Internationalization
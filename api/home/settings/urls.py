@@ -14,7 +14,11 @@ urlpatterns = [
 if settings.DEBUG:
     from django.conf.urls.static import static
 
+    from home.globals.views import serve_media
+
     urlpatterns += [
         *static(settings.STATIC_URL, document_root=settings.STATIC_ROOT),
-        *static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT),
+        *static(
+            settings.MEDIA_URL, view=serve_media, document_root=settings.MEDIA_ROOT
+        ),
     ]